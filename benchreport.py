@@ -0,0 +1,108 @@
+from pathlib import Path
+from filewriter import atomic_write
+import subprocess
+import platform
+import json
+import time
+import sys
+import os
+
+
+PERCENTILES = (50, 90, 95, 99)
+BENCH_PREFIX = "BENCH "
+
+
+def wait_until(app, predicate, timeout):
+    """Process Qt events until predicate() is true, returns False after timeout seconds."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+def emit_result(result):
+    """Hand the result of a child run back to launch_child."""
+    print(BENCH_PREFIX + json.dumps(result), flush=True)
+
+
+def launch_child(script, arguments, home, timeout):
+    """Run script --child with HOME pointed at home under the offscreen Qt platform."""
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home), QT_QPA_PLATFORM="offscreen",
+               BENCH_SPAWN_TIME=repr(time.time()))
+    command = [sys.executable, str(Path(script).resolve()), "--child"] + [str(argument) for argument in arguments]
+    try:
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f"timed out after {timeout} s"}
+    for line in completed.stdout.splitlines():
+        if line.startswith(BENCH_PREFIX):
+            return json.loads(line[len(BENCH_PREFIX):])
+    return {'error': f"exit code {completed.returncode}: {completed.stderr.strip()[-500:]}"}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(sorted_values, p):
+    """Linear interpolation between closest ranks, sorted_values must be sorted and non-empty."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {'n': 0}
+    summary = {'n': len(values), 'min': values[0], 'mean': sum(values) / len(values), 'max': values[-1]}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = percentile(values, p)
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in summary.items()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def write_report(path, name, parameters, samples, runs=None):
+    """Write a JSON report with percentile summaries of samples ({metric: [milliseconds]})."""
+    report = {
+        'benchmark': name,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'metrics': {metric: summarize(values) for metric, values in samples.items()},
+    }
+    if runs is not None:
+        report['runs'] = runs
+    atomic_write(path, json.dumps(report, indent=2))
+
+    print(f"{name} benchmark (ms unless the metric says otherwise)")
+    print(f"  {'metric':<32}{'n':>5}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for metric, summary in report['metrics'].items():
+        if summary['n']:
+            print(f"  {metric:<32}{summary['n']:>5}{summary['p50']:>10.1f}{summary['p90']:>10.1f}"
+                  f"{summary['p99']:>10.1f}{summary['max']:>10.1f}")
+        else:
+            print(f"  {metric:<32}{0:>5}")
+    print(f"Report written to {path}")
+    return report
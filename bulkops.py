@@ -0,0 +1,85 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import time
+import os
+
+
+VIEWED_MARK = "✓ "
+
+
+def viewed_fields(metadata, viewed):
+    """Fields that mark a video as watched or unwatched, None when it already is."""
+    if bool(metadata.get('viewed')) == viewed:
+        return None
+    title = metadata.get('title') or ''
+    if viewed:
+        return {'viewed': True, 'viewed_date': time.strftime('%Y%m%d_%H%M%S'),
+                'title': title if title.startswith(VIEWED_MARK) else VIEWED_MARK + title}
+    return {'viewed': False, 'viewed_date': None,
+            'title': title[len(VIEWED_MARK):] if title.startswith(VIEWED_MARK) else title}
+
+
+class BulkOperation(QThread):
+    """Applies one action to many videos on a worker thread.
+
+    Videos are processed in chunks of CHUNK_SIZE, each chunk is a single library
+    transaction, and facets are rebuilt once at the end. Stops after the current chunk
+    when an interruption is requested; completed reports what was actually processed.
+    """
+    progress = pyqtSignal(int, int)             # videos processed, total
+    completed = pyqtSignal(str, list, list)     # action, processed video_ids, error messages
+
+    ACTIONS = ('delete', 'mark_viewed', 'mark_unviewed')
+    CHUNK_SIZE = 200
+
+    def __init__(self, library, action, video_ids, parent=None):
+        super().__init__(parent)
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown bulk action: {action}")
+        self.library = library
+        self.action = action
+        self.video_ids = list(video_ids)
+        self.deleted_paths = []  # media files removed by a delete, read after completed
+        self.errors = []
+
+    def run(self):
+        processed = []
+        total = len(self.video_ids)
+        try:
+            with self.library.batch():
+                for start in range(0, total, self.CHUNK_SIZE):
+                    if self.isInterruptionRequested():
+                        break
+                    chunk = self.video_ids[start:start + self.CHUNK_SIZE]
+                    if self.action == 'delete':
+                        processed.extend(self.delete_chunk(chunk))
+                    else:
+                        viewed = self.action == 'mark_viewed'
+                        self.library.update_videos(chunk, lambda metadata: viewed_fields(metadata, viewed))
+                        processed.extend(chunk)
+                    self.progress.emit(min(start + len(chunk), total), total)
+        except Exception as e:
+            self.errors.append(str(e))
+            print(f"Error in bulk {self.action}: {e}")
+        self.completed.emit(self.action, processed, self.errors)
+
+    def delete_chunk(self, video_ids):
+        removed = []
+        for video_id in video_ids:
+            summary = self.library.get_summary(video_id)
+            if summary is None:
+                continue
+            paths = [summary.get('filename'), self.library.metadata_path(video_id)]
+            if summary.get('thumbnail_filename'):
+                paths.append(self.library.metadata_dir / summary['thumbnail_filename'])
+            for path in paths:
+                if not path or not os.path.exists(path):
+                    continue
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    self.errors.append(f"{path}: {e}")
+            if summary.get('filename'):
+                self.deleted_paths.append(summary['filename'])
+            removed.append(video_id)
+        self.library.remove_videos(removed)
+        return removed
@@ -0,0 +1,162 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import mmap
+import time
+import os
+
+
+HEAD_TAIL_BYTES = 64 * 1024
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def quick_digest(path, size):
+    """Hash of the first and last HEAD_TAIL_BYTES, enough to tell most different files apart."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(HEAD_TAIL_BYTES))
+        if size > HEAD_TAIL_BYTES:
+            f.seek(max(HEAD_TAIL_BYTES, size - HEAD_TAIL_BYTES))
+            digest.update(f.read(HEAD_TAIL_BYTES))
+    return digest.hexdigest()
+
+
+def content_digest(path):
+    """BLAKE2b of the whole file, read through mmap in HASH_CHUNK_BYTES slices.
+
+    hashlib releases the GIL while it hashes a large buffer, so several files are hashed
+    in parallel by plain threads, and page faults on the mapping are taken without it.
+    """
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for start in range(0, size, HASH_CHUNK_BYTES):
+                    digest.update(view[start:start + HASH_CHUNK_BYTES])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def group_by(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(files, cached=None, workers=None, on_progress=None, should_stop=None):
+    """Find files with identical content.
+
+    files is {video_id: path}, cached is {video_id: (size, mtime_ns, digest)} from an
+    earlier scan. Only files sharing their size with another file are read: first their
+    head and tail, then, for those still alike, the whole content. Returns
+    (groups of video_ids, {video_id: (size, mtime_ns, digest)} of every full hash, stats).
+    """
+    cached = cached or {}
+    workers = workers or min(4, os.cpu_count() or 1)
+    start = time.perf_counter()
+    stats = {'files': 0, 'candidates': 0, 'hashed_files': 0, 'hashed_bytes': 0, 'cached_files': 0}
+
+    entries = []  # (video_id, path, size, mtime_ns)
+    for video_id, path in files.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        # Empty files are placeholders, not media
+        if st.st_size:
+            entries.append((video_id, path, st.st_size, st.st_mtime_ns))
+    stats['files'] = len(entries)
+
+    def stopped():
+        return should_stop is not None and should_stop()
+
+    def safe(function, *args):
+        try:
+            return function(*args)
+        except OSError as e:
+            print(f"Error hashing {args[0]}: {e}")
+            return None
+
+    hashes = {}
+    groups = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        candidates = [entry for group in group_by(entries, lambda entry: entry[2]) for entry in group]
+        stats['candidates'] = len(candidates)
+        quick = dict(zip(candidates, pool.map(lambda entry: safe(quick_digest, entry[1], entry[2]), candidates)))
+        candidates = [entry for group in group_by([entry for entry in candidates if quick[entry]],
+                                                  lambda entry: (entry[2], quick[entry]))
+                      for entry in group]
+
+        to_hash = []
+        for entry in candidates:
+            video_id, _, size, mtime_ns = entry
+            if video_id in cached and cached[video_id][:2] == (size, mtime_ns):
+                hashes[video_id] = cached[video_id]
+                stats['cached_files'] += 1
+            else:
+                to_hash.append(entry)
+
+        total = len(to_hash)
+        # Largest first so one big file does not finish alone at the end
+        to_hash.sort(key=lambda entry: entry[2], reverse=True)
+        for done, (entry, digest) in enumerate(zip(to_hash, pool.map(
+                lambda entry: None if stopped() else safe(content_digest, entry[1]), to_hash)), 1):
+            video_id, _, size, mtime_ns = entry
+            if digest is not None:
+                hashes[video_id] = (size, mtime_ns, digest)
+                stats['hashed_files'] += 1
+                stats['hashed_bytes'] += size
+            if on_progress is not None:
+                on_progress(done, total)
+
+        for group in group_by([entry for entry in candidates if entry[0] in hashes],
+                              lambda entry: hashes[entry[0]][2]):
+            groups.append([video_id for video_id, _, _, _ in group])
+
+    seconds = time.perf_counter() - start
+    stats['interrupted'] = stopped()
+    stats['seconds'] = round(seconds, 3)
+    stats['mb_per_s'] = round(stats['hashed_bytes'] / (1024 * 1024) / seconds, 1) if seconds else 0
+    stats['duplicate_bytes'] = sum(hashes[group[0]][0] * (len(group) - 1) for group in groups)
+    return groups, hashes, stats
+
+
+class DedupScanner(QThread):
+    """Finds library videos whose media files have identical content.
+
+    Full hashes are stored in the library and reused while a file's size and mtime do
+    not change. Each group in completed is ordered oldest download first, the first
+    video is the one to keep.
+    """
+    progress = pyqtSignal(int, int)          # files hashed, files to hash
+    completed = pyqtSignal(list, dict)       # groups of video_ids, stats
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+
+    def run(self):
+        groups, stats = [], {}
+        try:
+            files = {video_id: filename for filename, video_id in self.library.filenames().items()
+                     if self.library.is_present(video_id)}
+            groups, hashes, stats = find_duplicates(files, self.library.content_hashes(),
+                                                    on_progress=self.progress.emit,
+                                                    should_stop=self.isInterruptionRequested)
+            self.library.store_content_hashes(hashes)
+
+            def download_date(video_id):
+                summary = self.library.get_summary(video_id) or {}
+                return summary.get('download_date') or ''
+
+            groups = [sorted(group, key=lambda video_id: (download_date(video_id), video_id)) for group in groups]
+        except Exception as e:
+            stats['error'] = str(e)
+            print(f"Error scanning for duplicates: {e}")
+        self.completed.emit(groups, stats)
@@ -0,0 +1,31 @@
+class DownloadArchive:
+    """yt-dlp download archive backed by the library instead of an archive file.
+
+    yt-dlp accepts any object supporting `in` and add() as its download_archive option.
+    It looks entries up as "<extractor key, lowercased> <video id>" before extracting
+    them, both for the entries of a playlist and for single video URLs it can read the
+    id from, so anything already in the library is skipped without a network request.
+    """
+
+    def __init__(self, library):
+        self.library = library
+        self.skipped = set()   # archive ids found in the library
+        self.recorded = set()  # archive ids downloaded by this run
+
+    def __bool__(self):
+        # yt-dlp does not consult an empty archive
+        return True
+
+    def __contains__(self, archive_id):
+        if not isinstance(archive_id, str):
+            return False
+        if archive_id in self.recorded:
+            return True
+        extractor_key, _, video_id = archive_id.partition(' ')
+        if video_id and self.library.in_archive(extractor_key, video_id):
+            self.skipped.add(archive_id)
+            return True
+        return False
+
+    def add(self, archive_id):
+        self.recorded.add(archive_id)
@@ -0,0 +1,98 @@
+from pathlib import Path
+from filewriter import atomic_write
+import json
+
+
+class DownloadJournal:
+    """Append-only journal of the download queue.
+
+    Every change is one JSON line: ["put", record] with the full record of a job (url,
+    format, title, state, output path...), ["remove", job_id], or ["order", [job_id...]]
+    after the queue was reordered. Replaying the lines gives the queue as it was last
+    written, so a crash or a forced exit loses at most the line being written. The
+    journal is rewritten as one put per job when it grows well past the queue size.
+    """
+    COMPACT_MIN_LINES = 500
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._journal = None
+        self._line_count = 0
+        self._records = {}  # job_id -> record, in queue order
+
+    def load(self):
+        """Replay the journal and return the job records in queue order."""
+        self._records = {}
+        self._line_count = 0
+        if not self.path.exists():
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    # A line cut short by a crash has no newline or does not parse, skip it
+                    if not line.endswith('\n'):
+                        continue
+                    try:
+                        self._apply(json.loads(line))
+                        self._line_count += 1
+                    except (ValueError, KeyError, IndexError, TypeError):
+                        continue
+        except Exception as e:
+            print(f"Error reading download journal: {e}")
+        return list(self._records.values())
+
+    def _apply(self, op):
+        kind = op[0]
+        if kind == 'put':
+            record = op[1]
+            self._records[record['job_id']] = record
+        elif kind == 'remove':
+            self._records.pop(op[1], None)
+        elif kind == 'order':
+            order = {job_id: index for index, job_id in enumerate(op[1])}
+            self._records = dict(sorted(self._records.items(), key=lambda item: order.get(item[0], len(order))))
+
+    def _log(self, *op):
+        self._apply(op)
+        try:
+            if self._journal is None:
+                self._journal = open(self.path, 'a', encoding='utf-8')
+            self._journal.write(json.dumps(op, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            self._line_count += 1
+        except Exception as e:
+            print(f"Error writing download journal: {e}")
+            return
+        if self._line_count > max(self.COMPACT_MIN_LINES, 4 * len(self._records)):
+            self.compact()
+
+    def put(self, record):
+        if self._records.get(record['job_id']) != record:
+            self._log('put', dict(record))
+
+    def remove(self, job_id):
+        if job_id in self._records:
+            self._log('remove', job_id)
+
+    def order(self, job_ids):
+        if list(self._records) != [job_id for job_id in job_ids if job_id in self._records]:
+            self._log('order', list(job_ids))
+
+    def compact_to(self, records):
+        """Replace the journaled queue with records and rewrite the journal."""
+        self._records = {record['job_id']: dict(record) for record in records}
+        self.compact()
+
+    def compact(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            atomic_write(self.path, "".join(json.dumps(['put', record], ensure_ascii=False) + "\n"
+                                            for record in self._records.values()))
+            self._line_count = len(self._records)
+        except Exception as e:
+            print(f"Error compacting download journal: {e}")
+
+    def close(self):
+        self.compact()
@@ -0,0 +1,346 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from downloadworker import DownloadWorker
+from pathlib import Path
+import itertools
+import re
+
+
+class DownloadJob:
+    """One URL in the download queue.
+
+    A job added by the user may be a playlist; its worker then lists the entries, which
+    are queued as jobs of their own while the listing goes on, and the playlist job is
+    dropped once every entry is queued.
+    """
+    STATES = ('queued', 'running', 'paused', 'done', 'failed', 'cancelled')
+    _ids = itertools.count(1)
+
+    def __init__(self, url, media_format, title=None, playlist=None, job_id=None):
+        self.job_id = job_id if job_id is not None else next(self._ids)
+        self.url = url
+        self.media_format = media_format
+        self.title = title or url
+        self.playlist = playlist  # title of the playlist an entry job came from
+        self.state = 'queued'
+        self.percent = 0.0
+        self.speed = ''
+        self.eta = ''
+        self.message = ''
+        self.output = None        # output path of the first run without extension, pinned for resuming
+        self.video_id = None      # the video that output belongs to
+        self.several = False      # the job downloads more than one video, its output is never pinned
+        self.listing = False      # the job lists a playlist, it does not download itself
+        self.entries = 0          # entries of that playlist queued so far
+        self.worker = None
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed', 'cancelled')
+
+    def record(self):
+        return {'job_id': self.job_id, 'url': self.url, 'media_format': self.media_format, 'title': self.title,
+                'playlist': self.playlist, 'state': self.state, 'message': self.message, 'output': self.output,
+                'video_id': self.video_id, 'several': self.several}
+
+    @classmethod
+    def from_record(cls, record):
+        job = cls(record['url'], record['media_format'], record.get('title'), record.get('playlist'),
+                  job_id=record['job_id'])
+        job.state = record.get('state', 'queued')
+        job.message = record.get('message') or ''
+        job.output = record.get('output')
+        job.video_id = record.get('video_id')
+        job.several = record.get('several', False)
+        return job
+
+    @classmethod
+    def reserve_ids(cls, last_id):
+        """Make new jobs continue after last_id, used after restoring a queue."""
+        cls._ids = itertools.count(max(last_id + 1, next(cls._ids)))
+
+
+class DownloadManager(QObject):
+    """Download queue served by up to max_workers parallel workers.
+
+    Jobs start in queue order. Every URL is extracted once: a video is downloaded right
+    away, a playlist is fanned out into one job per entry as its entries are listed, so
+    the first entries download while later pages are still being fetched, in parallel
+    under the same global limit. A job that is only listing does not take a slot.
+    """
+    jobs_changed = pyqtSignal()              # jobs added, removed or reordered
+    job_changed = pyqtSignal(int)            # state or progress of one job
+    job_finished = pyqtSignal(int, bool, str)  # job_id, success, message
+
+    DEFAULT_WORKERS = 3
+    MAX_WORKERS = 8
+
+    def __init__(self, download_dir, library, thumbnail_atlas=None, events=None, journal=None,
+                 thumbnail_fetcher=None, parent=None):
+        super().__init__(parent)
+        self.download_dir = Path(download_dir)
+        self.library = library
+        self.thumbnail_atlas = thumbnail_atlas
+        self.events = events
+        self.journal = journal  # optional DownloadJournal, the queue is restored from it on the next start
+        self.thumbnail_fetcher = thumbnail_fetcher  # shared by all workers, keeps its connections between videos
+        self.max_workers = self.DEFAULT_WORKERS
+        self.jobs = []        # queue order
+        self.threads = set()  # workers not finished yet, also those of paused or cancelled jobs
+        # Stopped worker -> job_id until its finished signal arrives, it still takes a slot and holds the job's files
+        self.stopping = {}
+
+    # ---------- Persistence ----------
+    def restore(self):
+        """Load the unfinished jobs of the last session from the journal, without starting them.
+
+        Jobs that were running are queued again; their downloads continue from the .part
+        files left behind.
+        """
+        if self.journal is None:
+            return
+        jobs = [DownloadJob.from_record(record) for record in self.journal.load()]
+        if jobs:
+            DownloadJob.reserve_ids(max(job.job_id for job in jobs))
+        self.jobs = [job for job in jobs if not job.finished]
+        for job in self.jobs:
+            if job.state == 'running':
+                job.state = 'queued'
+        self.journal.compact_to([job.record() for job in self.jobs])
+        self.jobs_changed.emit()
+
+    def save(self, job):
+        if self.journal is not None:
+            self.journal.put(job.record())
+
+    def save_order(self):
+        if self.journal is not None:
+            self.journal.order([job.job_id for job in self.jobs])
+
+    # ---------- Queue ----------
+    def job(self, job_id):
+        return next((job for job in self.jobs if job.job_id == job_id), None)
+
+    def add(self, url, media_format):
+        job = DownloadJob(url, media_format)
+        self.jobs.append(job)
+        self.save(job)
+        self.jobs_changed.emit()
+        self.schedule()
+        return job
+
+    def set_max_workers(self, count, schedule=True):
+        self.max_workers = max(1, min(self.MAX_WORKERS, int(count)))
+        if schedule:
+            self.schedule()
+
+    def running_count(self):
+        return sum(1 for job in self.jobs if job.state == 'running' and not job.listing)
+
+    def active_count(self):
+        return sum(1 for job in self.jobs if job.state in ('queued', 'running'))
+
+    def move(self, job_id, offset):
+        """Move a job offset places up (negative) or down the queue."""
+        job = self.job(job_id)
+        if job is None:
+            return False
+        index = self.jobs.index(job)
+        new_index = max(0, min(len(self.jobs) - 1, index + offset))
+        if new_index == index:
+            return False
+        self.jobs.insert(new_index, self.jobs.pop(index))
+        self.save_order()
+        self.jobs_changed.emit()
+        return True
+
+    def pause(self, job_id):
+        job = self.job(job_id)
+        if job is None or job.state not in ('queued', 'running'):
+            return False
+        if job.state == 'running':
+            self.stop_worker(job)
+        self.set_state(job, 'paused')
+        self.schedule()
+        return True
+
+    def resume(self, job_id):
+        job = self.job(job_id)
+        if job is None or job.state not in ('paused', 'failed'):
+            return False
+        job.message = ''
+        self.set_state(job, 'queued')
+        self.schedule()
+        return True
+
+    def cancel(self, job_id):
+        job = self.job(job_id)
+        if job is None or job.finished:
+            return False
+        if job.state == 'running':
+            self.stop_worker(job)
+        self.set_state(job, 'cancelled')
+        self.schedule()
+        return True
+
+    def clear_finished(self):
+        kept = [job for job in self.jobs if not job.finished]
+        if len(kept) != len(self.jobs):
+            if self.journal is not None:
+                for job in self.jobs:
+                    if job.finished:
+                        self.journal.remove(job.job_id)
+            self.jobs = kept
+            self.jobs_changed.emit()
+
+    def set_state(self, job, state, message=None):
+        job.state = state
+        if message is not None:
+            job.message = message
+        self.save(job)
+        self.job_changed.emit(job.job_id)
+
+    # ---------- Workers ----------
+    def schedule(self):
+        # A thread object must outlive its run(), drop them only once they are finished
+        self.threads = {thread for thread in self.threads if not thread.isFinished()}
+        running = self.running_count() + len(self.stopping)
+        # A job paused and resumed waits for its previous worker, both would write the same .part file
+        busy = set(self.stopping.values())
+        for job in self.jobs:
+            if running >= self.max_workers:
+                break
+            if job.state == 'queued' and job.job_id not in busy:
+                self.start_job(job)
+                running += 1
+
+    def start_job(self, job):
+        self.download_dir.mkdir(exist_ok=True)
+        job_id = job.job_id
+        outtmpl = job.output.replace('%', '%%') + '.%(ext)s' if job.output else None
+        worker = DownloadWorker(job.url, str(self.download_dir), job.media_format, self.library,
+                                self.thumbnail_atlas, self.events, fan_out=True, outtmpl=outtmpl,
+                                thumbnail_fetcher=self.thumbnail_fetcher)
+        worker.progress.connect(lambda info: self.on_worker_progress(job_id, info, worker))
+        worker.entries_found.connect(lambda title, entries: self.on_entries_found(job_id, title, entries, worker))
+        # DownloadWorker.finished is its own (success, message) signal, emitted last in run()
+        worker.finished.connect(lambda success, message: self.on_worker_finished(job_id, success, message, worker))
+        job.worker = worker
+        job.percent = 0.0
+        job.listing = False
+        job.entries = 0
+        self.threads.add(worker)
+        self.set_state(job, 'running', '')
+        worker.start()
+
+    def stop_worker(self, job):
+        if job.worker is not None:
+            job.worker.is_running = False
+            self.stopping[job.worker] = job.job_id
+        job.worker = None
+
+    def on_entries_found(self, job_id, title, entries, worker):
+        """Queue a batch of playlist entries in front of the playlist job that lists them."""
+        job = self.job(job_id)
+        if job is None or job.worker is not worker:
+            return
+        # A playlist listed again after a restart or a retry must not queue its entries twice
+        queued_urls = {other.url for other in self.jobs if not other.finished}
+        entry_jobs = [DownloadJob(entry['url'], job.media_format, entry['title'], playlist=title)
+                      for entry in entries if entry['url'] not in queued_urls]
+        job.title = title
+        job.listing = True
+        job.entries += len(entry_jobs)
+        index = self.jobs.index(job)
+        self.jobs[index:index] = entry_jobs
+        for entry_job in entry_jobs:
+            self.save(entry_job)
+        self.save_order()
+        self.save(job)
+        self.jobs_changed.emit()
+        self.schedule()
+
+    def on_worker_progress(self, job_id, info, worker):
+        job = self.job(job_id)
+        # Signals of a worker stopped by pause or cancel may still arrive, possibly after the job was resumed
+        if job is None or job.worker is not worker:
+            return
+        kind = info.get('type')
+        if kind == 'progress':
+            job.title = info.get('full_title') or job.title
+            job.percent = info.get('percent', job.percent)
+            job.speed = info.get('speed', '')
+            job.eta = info.get('eta', '')
+            self.pin_output(job, info)
+        elif kind == 'video_info':
+            job.title = info.get('title') or job.title
+        elif kind == 'finished_video':
+            job.percent = 100.0
+        elif kind == 'error':
+            job.message = info.get('message', '')
+        self.job_changed.emit(job_id)
+
+    def on_worker_finished(self, job_id, success, message, worker):
+        job = self.job(job_id)
+        if success and not worker.saved and not worker.skipped and not worker.listed:
+            success, message = False, "Nothing was downloaded"
+        # A paused or cancelled job already left the running state, its worker is only done now
+        if job is None or job.worker is not worker:
+            self.stopping.pop(worker, None)
+            self.schedule()
+            return
+        job.worker = None
+        if success and worker.listed:
+            # Every entry of the playlist is queued, the playlist job itself is done
+            self.jobs.remove(job)
+            if self.journal is not None:
+                self.journal.remove(job_id)
+            self.jobs_changed.emit()
+        else:
+            self.set_state(job, 'done' if success else 'failed', message)
+        self.job_finished.emit(job_id, success, f"{job.title}: {message}" if not worker.listed else message)
+        self.schedule()
+
+    def pin_output(self, job, info):
+        """Pin the output path of a single-video job, so a later run finds its .part file again.
+
+        A fixed path would send every entry of a job downloading several videos to the
+        first one's file, so such jobs keep the output template.
+        """
+        video_id = info.get('video_id')
+        if info.get('playlist_index') is not None or (job.video_id and video_id and video_id != job.video_id):
+            if not job.several:
+                job.several = True
+                job.output = None
+                self.save(job)
+        elif job.output is None and not job.several and info.get('filename'):
+            job.output = self.output_stem(info['filename'], info.get('format_id'))
+            job.video_id = video_id
+            self.save(job)
+
+    @staticmethod
+    def output_stem(filename, format_id=None):
+        """Output path without extension, and without the .f<format_id> of a format merged later."""
+        stem = str(Path(filename).with_suffix(''))
+        if format_id:
+            stem = re.sub(rf"\.f{re.escape(str(format_id))}$", "", stem)
+        return stem
+
+    def stop_all(self, timeout_ms=3000):
+        """Stop every worker and wait for them, terminating those that do not stop in time.
+
+        Running jobs are journaled as queued, so the next start continues them.
+        """
+        for job in self.jobs:
+            if job.state == 'running':
+                self.stop_worker(job)
+                job.state = 'queued'
+                self.save(job)
+        for thread in list(self.threads):
+            if isinstance(thread, DownloadWorker):
+                thread.is_running = False
+            if not thread.wait(timeout_ms):
+                thread.terminate()
+                if not thread.wait(500):
+                    print("Download thread still not terminated")
+        self.threads.clear()
+        self.stopping.clear()
@@ -0,0 +1,151 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton, QLabel, QSpinBox,
+    QAbstractItemView
+)
+
+
+STATE_LABELS = {
+    'queued': "Queued",
+    'running': "Downloading",
+    'paused': "Paused",
+    'done': "Done",
+    'failed': "Failed",
+    'cancelled': "Cancelled",
+}
+
+
+class DownloadsPanel(QWidget):
+    """Lists the jobs of a DownloadManager with their state and progress."""
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.items = {}  # job_id -> QListWidgetItem
+        self.order = []  # job_ids in row order, mirrors the list widget
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.job_list = QListWidget()
+        self.job_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.job_list.setAlternatingRowColors(True)
+        self.job_list.itemSelectionChanged.connect(self.update_buttons)
+        layout.addWidget(self.job_list)
+
+        buttons = QHBoxLayout()
+        self.up_button = QPushButton("Up")
+        self.up_button.clicked.connect(lambda: self.move_selected(-1))
+        self.down_button = QPushButton("Down")
+        self.down_button.clicked.connect(lambda: self.move_selected(1))
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.clicked.connect(lambda: self.apply_to_selected(self.manager.pause))
+        self.resume_button = QPushButton("Resume")
+        self.resume_button.clicked.connect(lambda: self.apply_to_selected(self.manager.resume))
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(lambda: self.apply_to_selected(self.manager.cancel))
+        self.clear_button = QPushButton("Clear Finished")
+        self.clear_button.clicked.connect(self.manager.clear_finished)
+        for button in (self.up_button, self.down_button, self.pause_button, self.resume_button,
+                       self.cancel_button, self.clear_button):
+            buttons.addWidget(button)
+        buttons.addStretch()
+
+        buttons.addWidget(QLabel("Parallel downloads:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, manager.MAX_WORKERS)
+        self.workers_spin.setValue(manager.max_workers)
+        self.workers_spin.valueChanged.connect(self.manager.set_max_workers)
+        buttons.addWidget(self.workers_spin)
+        layout.addLayout(buttons)
+
+        manager.jobs_changed.connect(self.rebuild)
+        manager.job_changed.connect(self.update_job)
+        self.rebuild()
+
+    def rebuild(self):
+        """Bring the rows in line with the queue, touching only those added, removed or moved.
+
+        A large playlist queues its entries in many small batches, recreating every row
+        for each of them would cost quadratic time on the GUI thread.
+        """
+        job_ids = [job.job_id for job in self.manager.jobs]
+        wanted = set(job_ids)
+        for row in range(len(self.order) - 1, -1, -1):
+            if self.order[row] not in wanted:
+                self.job_list.takeItem(row)
+                del self.items[self.order.pop(row)]
+        for row, job_id in enumerate(job_ids):
+            if row < len(self.order) and self.order[row] == job_id:
+                continue
+            item = self.items.get(job_id)
+            if item is not None:
+                selected = item.isSelected()
+                old_row = self.order.index(job_id)
+                self.job_list.takeItem(old_row)
+                del self.order[old_row]
+            else:
+                selected = False
+                item = QListWidgetItem()
+                item.setData(Qt.ItemDataRole.UserRole, job_id)
+                self.items[job_id] = item
+            self.job_list.insertItem(row, item)
+            self.order.insert(row, job_id)
+            item.setSelected(selected)
+            self.update_job(job_id)
+        self.update_buttons()
+
+    def update_job(self, job_id):
+        job = self.manager.job(job_id)
+        item = self.items.get(job_id)
+        if job is None or item is None:
+            return
+        title = f"{job.playlist}: {job.title}" if job.playlist else job.title
+        text = f"{STATE_LABELS.get(job.state, job.state)} - {title}"
+        if job.state == 'running' and job.listing:
+            text += f" - listing entries, {job.entries} queued..."
+        elif job.state == 'running':
+            text += f" - {job.percent:.1f}%"
+            if job.speed and job.speed != 'N/A':
+                text += f" | {job.speed}"
+            if job.eta and job.eta != 'N/A':
+                text += f" | ETA: {job.eta}"
+        elif job.message and job.state in ('done', 'failed'):
+            text += f" - {job.message}"
+        item.setText(text)
+        item.setToolTip(job.url)
+        if item.isSelected():
+            self.update_buttons()
+
+    def selected_job_ids(self):
+        return [item.data(Qt.ItemDataRole.UserRole) for item in self.job_list.selectedItems()]
+
+    def selected_jobs(self):
+        return [job for job in (self.manager.job(job_id) for job_id in self.selected_job_ids()) if job is not None]
+
+    def apply_to_selected(self, action):
+        for job_id in self.selected_job_ids():
+            action(job_id)
+        self.update_buttons()
+
+    def move_selected(self, offset):
+        job_ids = self.selected_job_ids()
+        # Move the job nearest to the destination first so the selection keeps its order
+        positions = {job.job_id: index for index, job in enumerate(self.manager.jobs)}
+        for job_id in sorted(job_ids, key=lambda job_id: positions.get(job_id, 0), reverse=offset > 0):
+            self.manager.move(job_id, offset)
+
+    def update_buttons(self):
+        jobs = self.selected_jobs()
+        self.up_button.setEnabled(bool(jobs))
+        self.down_button.setEnabled(bool(jobs))
+        self.pause_button.setEnabled(any(job.state in ('queued', 'running') for job in jobs))
+        self.resume_button.setEnabled(any(job.state in ('paused', 'failed') for job in jobs))
+        self.cancel_button.setEnabled(any(not job.finished for job in jobs))
+
+    def set_max_workers(self, count):
+        """Apply a saved limit without starting downloads, the window schedules them once the library is loaded."""
+        self.workers_spin.blockSignals(True)
+        self.workers_spin.setValue(count)
+        self.workers_spin.blockSignals(False)
+        self.manager.set_max_workers(count, schedule=False)
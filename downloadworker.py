@@ -1,19 +1,35 @@
 from PyQt6.QtCore import QThread, pyqtSignal
+from downloadarchive import DownloadArchive
+from thumbnailfetcher import fetch_thumbnail
 from pathlib import Path
-import yt_dlp
 import time
-import json
 import hashlib
-import urllib.request
 
 
 class DownloadWorker(QThread):
     finished = pyqtSignal(bool, str)  # success, message
     progress = pyqtSignal(dict)  # progress info dict
-    metadata_saved = pyqtSignal(dict)  # emit when metadata is saved
+    entries_found = pyqtSignal(str, list)  # playlist title, new entries [{'url', 'title'}], with fan_out
 
-    def __init__(self, url: str, download_dir: str, media_format: str):
+    ENTRY_BATCH = 25
+    ENTRY_BATCH_SECONDS = 0.5
+    MAX_RESOLVE = 10  # url results followed before the playlist check
+
+    def __init__(self, url: str, download_dir: str, media_format: str, library, thumbnail_atlas=None,
+                 events=None, fan_out=False, outtmpl=None, thumbnail_fetcher=None):
         super().__init__()
+        # With fan_out a playlist is not downloaded here, its entries are handed out through
+        # entries_found as they are listed so the download manager can queue them
+        self.fan_out = fan_out
+        # A queued job that was interrupted passes the output template of its first run, so yt-dlp
+        # finds the .part files again even if the title changed meanwhile
+        self.outtmpl = outtmpl or str(Path(download_dir) / '%(title)s.%(ext)s')
+        self.library = library
+        self.events = events
+        self.thumbnail_atlas = thumbnail_atlas
+        # A shared ThumbnailFetcher takes thumbnails off this thread so a slow image host never holds up
+        # the next download; without one they are fetched here
+        self.thumbnail_fetcher = thumbnail_fetcher
         self.url = url
         self.download_dir = download_dir
         self.media_format = media_format
@@ -23,10 +39,17 @@ class DownloadWorker(QThread):
         self.last_progress_time = 0
         self.last_percent = 0
         self.is_running = True
+        self.saved = 0
+        self.skipped = 0
+        self.listed = 0
         self.metadata_dir = Path(download_dir) / "metadata"
 
     def run(self):
         try:
+            # yt_dlp and its extractor registry are heavy, import them on this thread on first use
+            import yt_dlp
+            from savemetadata import SaveMetadataPP
+
             # Create metadata directory if it doesn't exist
             self.metadata_dir.mkdir(exist_ok=True)
 
@@ -37,74 +60,135 @@ class DownloadWorker(QThread):
             else:
                 format_opts = "best"
 
-            ydl_info_opts = {
-                'quiet': True,
-                'extract_flat': True,
-                'ignoreerrors': True,
-            }
-
-            with yt_dlp.YoutubeDL(ydl_info_opts) as ydl:
-                info = ydl.extract_info(self.url, download=False)
-
-                if info and '_type' in info and info['_type'] == 'playlist':
-                    self.total_videos = len(info.get('entries', []))
-                    self.progress.emit({
-                        'type': 'playlist_info',
-                        'total': self.total_videos,
-                        'title': info.get('title', 'Playlist'),
-                        'message': f"Found {self.total_videos} videos in playlist"
-                    })
-                else:
-                    self.total_videos = 1
-                    if info and 'title' in info:
-                        self.current_title = info['title']
-                        self.progress.emit({
-                            'type': 'video_info',
-                            'title': self.current_title,
-                            'message': f"Found: {self.current_title}"
-                        })
+            # Entries already in the library are dropped before yt-dlp extracts them
+            archive = DownloadArchive(self.library)
 
             def progress_hook(d):
                 self.process_progress_hook(d)
 
             ydl_opts = {
-                'outtmpl': str(Path(self.download_dir) / '%(title)s.%(ext)s'),
+                'outtmpl': self.outtmpl,
+                'continuedl': True,
                 'format': format_opts,
                 'postprocessors': [],
                 'progress_hooks': [progress_hook],
                 'quiet': True,
                 'no_warnings': True,
                 'ignoreerrors': True,
-                'extract_flat': False,
+                # Process every entry but do not keep the finished ones in the returned playlist
+                'extract_flat': 'discard_in_playlist',
+                'lazy_playlist': True,
                 'noprogress': False,
                 'writethumbnail': False,
                 'writesubtitles': False,
                 'writeautomaticsub': False,
+                'download_archive': archive,
             }
 
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.url, download=True)
-
-                # Save metadata for each downloaded item
-                if info and '_type' in info and info['_type'] == 'playlist':
-                    entries = info.get('entries', [])
-                    for entry in entries:
-                        if entry and 'requested_downloads' in entry:
-                            metadata = self.save_metadata(entry)
-                            if metadata:
-                                self.metadata_saved.emit(metadata)
+                ydl.add_post_processor(SaveMetadataPP(self), when='after_move')
+
+                # One extraction: process=False returns the extractor's result as is, a playlist
+                # keeps its entries as a lazy iterable, and a video is then downloaded from it
+                info = ydl.extract_info(self.url, download=False, process=False)
+                # A share link such as youtu.be/<id>?list=<playlist> only points to the playlist extractor
+                info = self.resolve(ydl, info)
+
+                if info and info.get('_type') == 'playlist':
+                    title = info.get('title') or self.url
+                    self.total_videos = info.get('playlist_count') or 0
+                    self.progress.emit({
+                        'type': 'playlist_info',
+                        'total': self.total_videos,
+                        'title': title,
+                        'message': f"Listing playlist {title}"
+                    })
+                    if self.fan_out:
+                        self.list_entries(ydl, title, info.get('entries'))
+                        self.skipped = len(archive.skipped)
+                        if not self.is_running:
+                            self.finished.emit(False, "Download stopped")
+                        else:
+                            self.finished.emit(True, f"Playlist {title}: {self.listed - self.skipped} new, "
+                                                     f"{self.skipped} skipped")
+                        return
                 elif info:
-                    metadata = self.save_metadata(info)
-                    if metadata:
-                        self.metadata_saved.emit(metadata)
+                    self.current_title = info.get('title') or self.current_title
+                    if self.current_title:
+                        self.progress.emit({
+                            'type': 'video_info',
+                            'title': self.current_title,
+                            'message': f"Found: {self.current_title}"
+                        })
 
-            if self.is_running:
+                if info:
+                    # SaveMetadataPP stores every entry as soon as it is downloaded
+                    ydl.process_ie_result(info, download=True)
+
+            self.skipped = len(archive.skipped)
+            if not self.is_running:
+                self.finished.emit(False, "Download stopped")
+            elif not self.saved and self.skipped:
+                self.finished.emit(True, f"Nothing new to download, {self.skipped} skipped")
+            elif self.skipped or self.saved > 1:
+                self.finished.emit(True, f"Download completed: {self.skipped} skipped, {self.saved} new")
+            else:
                 self.finished.emit(True, "Download completed successfully")
         except Exception as e:
             if self.is_running:
                 self.finished.emit(False, f"Download failed: {str(e)}")
-
-    def save_metadata(self, info_dict):
+            else:
+                self.finished.emit(False, "Download stopped")
+
+    def resolve(self, ydl, info):
+        """Follow url and url_transparent results until the extractor that handles them answers.
+
+        url_transparent fields override the resolved ones, the way process_ie_result merges them.
+        """
+        for _ in range(self.MAX_RESOLVE):
+            if not info or info.get('_type') not in ('url', 'url_transparent') or not self.is_running:
+                break
+            resolved = ydl.extract_info(info['url'], ie_key=info.get('ie_key'), download=False, process=False)
+            if resolved and info['_type'] == 'url_transparent':
+                exempted = {'_type', 'url', 'ie_key'}
+                if not info.get('section_end') and info.get('section_start') is None:
+                    exempted |= {'id', 'extractor', 'extractor_key'}
+                resolved = {**resolved, **{key: value for key, value in info.items()
+                                           if value is not None and key not in exempted}}
+                if resolved.get('_type') == 'url':
+                    resolved['_type'] = 'url_transparent'
+            info = resolved
+        return info
+
+    def list_entries(self, ydl, title, entries):
+        """Hand out the entries of a playlist in small batches while the extractor is still paging."""
+        batch = []
+        sent = False
+        last_emit = time.monotonic()
+        for entry in entries or ():
+            if not self.is_running:
+                break
+            if not entry:
+                continue
+            self.listed += 1
+            if ydl.in_download_archive(entry):
+                continue
+            url = entry.get('url') or entry.get('webpage_url')
+            if not url:
+                continue
+            batch.append({'url': url, 'title': entry.get('title') or entry.get('id') or url})
+            # The first entry goes out alone so its download starts right away
+            if not sent or len(batch) >= self.ENTRY_BATCH or \
+                    time.monotonic() - last_emit > self.ENTRY_BATCH_SECONDS:
+                self.entries_found.emit(title, batch)
+                batch = []
+                sent = True
+                last_emit = time.monotonic()
+        if batch:
+            self.entries_found.emit(title, batch)
+
+    def save_metadata(self, info_dict, log=print, report_error=print):
+        """Add a downloaded entry to the library; SaveMetadataPP passes yt-dlp's own output functions."""
         try:
             video_id = info_dict.get('id', '')
             if not video_id:
@@ -144,40 +228,60 @@ class DownloadWorker(QThread):
             else:
                 metadata['chapters'] = []
 
-            if 'requested_downloads' in info_dict and info_dict['requested_downloads']:
+            # Postprocessors get the final path as filepath, a finished info dict lists it in requested_downloads
+            filepath = info_dict.get('filepath')
+            if not filepath and info_dict.get('requested_downloads'):
                 filepath = info_dict['requested_downloads'][0].get('filepath', '')
-                if filepath:
-                    metadata['filename'] = filepath
-                    metadata['filename_short'] = Path(filepath).name
-
-            if metadata['thumbnail']:
-                thumbnail_filename = f"{video_id}.jpg"
-                thumbnail_path = self.metadata_dir / thumbnail_filename
+            if filepath:
+                metadata['filename'] = filepath
+                metadata['filename_short'] = Path(filepath).name
+
+            metadata['thumbnail_filename'] = None
+            metadata['thumbnail_path'] = None
+            thumbnail_path = self.metadata_dir / f"{video_id}.jpg"
+            if metadata['thumbnail'] and self.thumbnail_fetcher is None:
                 try:
-                    urllib.request.urlretrieve(metadata['thumbnail'], thumbnail_path)
-                    metadata['thumbnail_filename'] = thumbnail_filename
-                    metadata['thumbnail_path'] = str(thumbnail_path)
+                    fetch_thumbnail(metadata['thumbnail'], thumbnail_path)
+                    metadata.update(self.save_thumbnail(video_id, thumbnail_path))
                 except Exception as e:
-                    print(f"Error downloading thumbnail: {e}")
-                    metadata['thumbnail_filename'] = None
-                    metadata['thumbnail_path'] = None
+                    report_error(f"Error downloading thumbnail: {e}")
 
-            metadata_filename = f"{video_id}.json"
-            metadata_path = self.metadata_dir / metadata_filename
+            self.library.add_video(metadata)
+            if self.events is not None:
+                self.events.video_added.emit(video_id)
 
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            # Queued once the video is in the library, the fetcher then fills in its thumbnail
+            if metadata['thumbnail'] and self.thumbnail_fetcher is not None:
+                self.thumbnail_fetcher.fetch(metadata['thumbnail'], thumbnail_path,
+                                             lambda path, error: path and self.save_thumbnail(video_id, path, True))
 
-            print(f"Metadata saved: {metadata_filename}")
+            log(f"Metadata saved: {video_id}")
             return metadata
 
         except Exception as e:
-            print(f"Error saving metadata: {e}")
+            report_error(f"Error saving metadata: {e}")
             return None
 
+    def save_thumbnail(self, video_id, thumbnail_path, notify=False):
+        fields = {'thumbnail_filename': thumbnail_path.name, 'thumbnail_path': str(thumbnail_path)}
+        self.generate_thumbnail_derivative(video_id, thumbnail_path)
+        if notify:
+            # Called on a fetcher thread once the video is already in the library
+            self.library.update_video(video_id, **fields)
+            if self.events is not None:
+                self.events.video_updated.emit(video_id, ['thumbnail_filename'])
+        return fields
+
+    def generate_thumbnail_derivative(self, video_id, thumbnail_path):
+        # Pack a display-sized copy into the atlas so the sidebar never has to scale the original
+        if self.thumbnail_atlas is not None:
+            self.thumbnail_atlas.add_from_file(video_id, thumbnail_path)
+
     def process_progress_hook(self, d):
         if not self.is_running:
-            return
+            # Aborts the transfer, the .part file is kept so a later run continues it
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled()
 
         try:
             current_time = time.time()
@@ -228,6 +332,10 @@ class DownloadWorker(QThread):
                     'percent': percent,
                     'speed': speed,
                     'eta': eta,
+                    'filename': d.get('filename'),
+                    'format_id': d.get('info_dict', {}).get('format_id'),
+                    'video_id': d.get('info_dict', {}).get('id'),
+                    'playlist_index': d.get('info_dict', {}).get('playlist_index'),
                     'message': f"Downloading {display_title}"
                 })
 
@@ -0,0 +1,163 @@
+from pathlib import Path
+import threading
+import time
+import os
+
+
+def atomic_write(path, data):
+    """Write data to path through a temp file, fsync and rename, so readers never see a partial file."""
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class BackgroundWriter:
+    """Single writer thread for small state files (metadata JSON exports, playlists).
+
+    Writes to the same path within COALESCE_WINDOW seconds of each other are merged
+    and only the newest payload is written. A payload may be bytes, str or a callable
+    returning either, so serialization also happens off the calling thread. Appends
+    (journal lines) to a path are written after its pending payload, if any, and a
+    new payload for the path replaces the appends queued before it. Paths are written
+    in the order of their last write() request, so a snapshot requested before the
+    journal it replaces is truncated reaches the disk first.
+    """
+    COALESCE_WINDOW = 0.25
+
+    def __init__(self, coalesce_window=None):
+        self.coalesce_window = self.COALESCE_WINDOW if coalesce_window is None else coalesce_window
+        self._pending = {}  # path -> (payload or None for appends only, on_written, first_request_time, [appended])
+        self._cond = threading.Condition()
+        self._busy = False
+        self._flush_requested = False
+        self._stopping = False
+
+        self.bytes_written = 0
+        self.writes_requested = 0
+        self.writes_performed = 0
+        self.writes_coalesced = 0
+        self.write_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="BackgroundWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, path, payload, on_written=None):
+        path = Path(path)
+        with self._cond:
+            self.writes_requested += 1
+            previous = self._pending.pop(path, None)
+            if previous is not None:
+                self.writes_coalesced += 1
+                first_request_time = previous[2]
+            else:
+                first_request_time = time.monotonic()
+            self._pending[path] = (payload, on_written, first_request_time, [])
+            self._cond.notify_all()
+
+    def append(self, path, data):
+        """Append data to path, after any payload still pending for it."""
+        path = Path(path)
+        with self._cond:
+            self.writes_requested += 1
+            previous = self._pending.get(path)
+            if previous is not None:
+                self.writes_coalesced += 1
+                previous[3].append(data)
+            else:
+                self._pending[path] = (None, None, time.monotonic(), [data])
+            self._cond.notify_all()
+
+    def cancel(self, path):
+        with self._cond:
+            return self._pending.pop(Path(path), None) is not None
+
+    def flush(self, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._flush_requested = False
+            return not self._pending and not self._busy
+
+    def close(self, timeout=10.0):
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        return flushed
+
+    def stats(self):
+        with self._cond:
+            return {
+                'bytes_written': self.bytes_written,
+                'writes_requested': self.writes_requested,
+                'writes_performed': self.writes_performed,
+                'writes_coalesced': self.writes_coalesced,
+                'write_errors': self.write_errors,
+            }
+
+    def _take_due(self):
+        # In request order, stopping at the first entry still inside its window
+        now = time.monotonic()
+        due = {}
+        next_deadline = None
+        for path, entry in list(self._pending.items()):
+            deadline = entry[2] + self.coalesce_window
+            if not (self._flush_requested or self._stopping or deadline <= now):
+                next_deadline = deadline
+                break
+            due[path] = self._pending.pop(path)
+        return due, next_deadline
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping and not self._pending:
+                        return
+                    due, next_deadline = self._take_due()
+                    if due:
+                        self._busy = True
+                        break
+                    timeout = None if next_deadline is None else max(0.0, next_deadline - time.monotonic())
+                    self._cond.wait(timeout)
+
+            for path, (payload, on_written, _, appended) in due.items():
+                try:
+                    appended = b"".join(chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                                        for chunk in appended)
+                    if payload is None:
+                        with open(path, 'ab') as f:
+                            f.write(appended)
+                        written = len(appended)
+                    else:
+                        data = payload() if callable(payload) else payload
+                        if isinstance(data, str):
+                            data = data.encode('utf-8')
+                        written = atomic_write(path, data + appended)
+                    with self._cond:
+                        self.bytes_written += written
+                        self.writes_performed += 1
+                    if on_written is not None:
+                        on_written(path)
+                except Exception as e:
+                    with self._cond:
+                        self.write_errors += 1
+                    print(f"Error writing {path}: {e}")
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,688 @@
+from pathlib import Path
+from filewriter import atomic_write
+from libraryfacets import FacetIndex, sort_key
+from contextlib import contextmanager
+import sqlite3
+import threading
+import json
+import os
+import re
+
+
+# Fields the video list, sorting and facets need. Only these are kept in memory,
+# everything else (description, chapters, formats, URLs...) is read on demand.
+SUMMARY_FIELDS = (
+    'video_id', 'filename', 'title', 'uploader', 'duration', 'thumbnail_filename',
+    'download_date', 'upload_date', 'view_count', 'viewed', 'viewed_date',
+    'format', 'extractor', 'extractor_key',
+)
+
+
+def make_summary(metadata):
+    return {field: metadata[field] for field in SUMMARY_FIELDS if metadata.get(field) is not None}
+
+
+class LibraryIndex:
+    """Persistent SQLite index of downloaded media.
+
+    The per-video JSON files in the metadata directory are kept as an
+    import/export format: they are imported once on first start and
+    re-exported whenever a record changes.
+
+    Each video is stored twice: the full metadata document in videos, and a small
+    summary (SUMMARY_FIELDS) in video_summaries. Startup and the in-memory cache
+    only touch summaries; get_video reads the full document when it is needed.
+
+    Constructing an index only opens the database, load() fills the in-memory cache
+    and is meant to run on a worker thread.
+    """
+    LOAD_CHUNK = 500
+    WRITE_CHUNK = 200  # records per transaction of the one-time import and index build
+
+    def __init__(self, metadata_dir, writer=None):
+        self.metadata_dir = Path(metadata_dir)
+        self.writer = writer  # optional BackgroundWriter for the JSON exports
+        self.metadata_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.metadata_dir / "library.db"
+        self._lock = threading.RLock()
+        # The download worker writes from its own thread, access is serialized by self._lock
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+        # In-memory lookup tables, built once and kept in sync by every write
+        self._by_id = {}             # video_id -> summary
+        self._by_filename = {}
+        self._missing = set()        # video_ids whose media file is not on disk
+        self._export_mtimes = {}     # video_id -> mtime_ns of the JSON file we last wrote
+        self.facets = FacetIndex()   # sort orders and facet memberships of present videos
+        # Set by batch() for its own thread only, facets are rebuilt once at its end. Writers on
+        # other threads (a download finishing meanwhile) keep updating them
+        self._batch_state = threading.local()
+        self.loaded = False
+
+    def create_schema(self):
+        with self._lock, self._conn:
+            # video_id is the primary key and therefore already indexed
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    title TEXT,
+                    uploader TEXT,
+                    duration INTEGER,
+                    thumbnail_filename TEXT,
+                    download_date TEXT,
+                    viewed INTEGER NOT NULL DEFAULT 0,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    present INTEGER NOT NULL DEFAULT 1,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_filename ON videos(filename)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_download_date ON videos(download_date)")
+            # Kept apart from videos so reading summaries never walks the pages of large metadata documents
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS video_summaries (
+                    video_id TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS library_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+            # Full-text search: one document per video (title, uploader, description) and one
+            # per chapter (chapter title). search_docs maps FTS rowids back to videos/chapters.
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_docs (
+                    doc_id INTEGER PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    chapter_start REAL,
+                    chapter_title TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_docs_video_id ON search_docs(video_id)")
+            # Content hashes of media files, reused while size and mtime are unchanged
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS content_hashes (
+                    video_id TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    digest TEXT NOT NULL
+                )
+            """)
+            try:
+                self._conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                        title, uploader, description,
+                        tokenize = 'unicode61 remove_diacritics 2',
+                        prefix = '2 3'
+                    )
+                """)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                print(f"SQLite FTS5 not available, search falls back to substring matching: {e}")
+                self.fts_enabled = False
+
+    def build_summaries(self):
+        """Derive summaries for records stored before video_summaries existed, only runs once."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM library_meta WHERE key = 'summaries'").fetchone()
+            if row is not None:
+                return
+            with self._conn:
+                for row in self._conn.execute("""
+                    SELECT v.metadata FROM videos v
+                    LEFT JOIN video_summaries s ON s.video_id = v.video_id
+                    WHERE s.video_id IS NULL
+                """).fetchall():
+                    summary = make_summary(json.loads(row['metadata']))
+                    self._conn.execute("INSERT OR REPLACE INTO video_summaries (video_id, summary) VALUES (?, ?)",
+                                       (summary['video_id'], json.dumps(summary, ensure_ascii=False)))
+                self._conn.execute("INSERT OR REPLACE INTO library_meta (key, value) VALUES ('summaries', '1')")
+
+    def load(self, on_chunk=None, chunk_size=None):
+        """Fill the in-memory cache from the database, newest download first.
+
+        After every chunk_size records on_chunk(rows, loaded, total) is called with the
+        list rows (see summary) of the present videos in that chunk, so a view can show
+        them while the rest of the library is still loading. Sort orders and facets are
+        built once every record is in.
+        """
+        chunk_size = chunk_size or self.LOAD_CHUNK
+        self.build_summaries()
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT s.video_id, s.summary, v.present
+                FROM video_summaries s JOIN videos v ON v.video_id = s.video_id
+                ORDER BY v.download_date DESC
+            """).fetchall()
+            self.loaded = False
+            self._by_id.clear()
+            self._by_filename.clear()
+            self._missing.clear()
+            self.facets.clear()
+
+        total = len(rows)
+        for start in range(0, total, chunk_size):
+            chunk = [(row['video_id'], json.loads(row['summary']), row['present'])
+                     for row in rows[start:start + chunk_size]]
+            with self._lock:
+                for video_id, summary, present in chunk:
+                    self._by_id[video_id] = summary
+                    if summary.get('filename'):
+                        self._by_filename[summary['filename']] = video_id
+                    if not present:
+                        self._missing.add(video_id)
+                list_rows = [self.summary(video_id) for video_id, _, present in chunk if present]
+            if on_chunk is not None:
+                on_chunk(list_rows, min(start + chunk_size, total), total)
+
+        with self._lock:
+            self.facets.rebuild((video_id, summary) for video_id, summary in self._by_id.items()
+                                if video_id not in self._missing)
+            self.loaded = True
+        self.build_search_index()
+
+    @property
+    def _facets_deferred(self):
+        return getattr(self._batch_state, 'deferred', False)
+
+    def _cache_put(self, summary, present=1):
+        video_id = summary['video_id']
+        old = self._by_id.get(video_id)
+        if old is not None and old.get('filename') and self._by_filename.get(old['filename']) == video_id:
+            del self._by_filename[old['filename']]
+        self._by_id[video_id] = summary
+        if summary.get('filename'):
+            self._by_filename[summary['filename']] = video_id
+        self._mark_present(video_id, present)
+
+    def _mark_present(self, video_id, present):
+        if present:
+            self._missing.discard(video_id)
+            if not self._facets_deferred:
+                self.facets.add(video_id, self._by_id[video_id])
+        else:
+            self._missing.add(video_id)
+            if not self._facets_deferred:
+                self.facets.remove(video_id)
+
+    def _cache_pop(self, video_id):
+        self._missing.discard(video_id)
+        if not self._facets_deferred:
+            self.facets.remove(video_id)
+        self._export_mtimes.pop(video_id, None)
+        old = self._by_id.pop(video_id, None)
+        if old is not None and old.get('filename') and self._by_filename.get(old['filename']) == video_id:
+            del self._by_filename[old['filename']]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- Import / export ----------
+    def migrate_json_files(self):
+        """Import the legacy per-video JSON files, only runs once per library.
+
+        Files are read outside the lock and written WRITE_CHUNK at a time, each chunk in
+        its own transaction, so the GUI thread is never held up for the whole import.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM library_meta WHERE key = 'json_imported'").fetchone()
+        if row is not None:
+            return 0
+
+        files = [path for path in self.metadata_dir.glob("*.json") if path.name != "playlists.json"]
+        imported = 0
+        for start in range(0, len(files), self.WRITE_CHUNK):
+            records = []
+            for metadata_file in files[start:start + self.WRITE_CHUNK]:
+                try:
+                    with open(metadata_file, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                    if not metadata.get('video_id'):
+                        metadata['video_id'] = metadata_file.stem
+                    records.append((metadata_file, metadata))
+                except Exception as e:
+                    print(f"Error importing {metadata_file}: {e}")
+            with self._lock, self._conn:
+                for metadata_file, metadata in records:
+                    try:
+                        self._upsert(metadata)
+                        imported += 1
+                    except Exception as e:
+                        print(f"Error importing {metadata_file}: {e}")
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO library_meta (key, value) VALUES ('json_imported', '1')")
+        print(f"Imported {imported} metadata files into the library index")
+        return imported
+
+    def metadata_path(self, video_id):
+        return self.metadata_dir / f"{video_id}.json"
+
+    def export_json(self, video_id):
+        metadata = self.get_video(video_id)
+        if metadata is None:
+            return
+        path = self.metadata_path(video_id)
+        payload = lambda: json.dumps(metadata, ensure_ascii=False, indent=2)
+        on_written = lambda written_path: self._record_export(video_id, written_path)
+        try:
+            if self.writer is not None:
+                self.writer.write(path, payload, on_written)
+            else:
+                atomic_write(path, payload())
+                on_written(path)
+        except Exception as e:
+            print(f"Error exporting metadata for {video_id}: {e}")
+
+    def _record_export(self, video_id, path):
+        try:
+            self._export_mtimes[video_id] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+
+    def import_json_file(self, path):
+        """Import a JSON file written outside the app.
+
+        Returns ('added' or 'updated', video_id), or (None, video_id) when the file was our
+        own export or could not be read.
+        """
+        path = Path(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            # Our own export of a video is named after its video_id, skip it without parsing
+            with self._lock:
+                if self._export_mtimes.get(path.stem) == mtime_ns:
+                    return None, path.stem
+            with open(path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except Exception as e:
+            print(f"Error importing {path}: {e}")
+            return None, path.stem
+        video_id = metadata.get('video_id') or path.stem
+        metadata['video_id'] = video_id
+        with self._lock:
+            if self._export_mtimes.get(video_id) == mtime_ns:
+                return None, video_id
+            existed = video_id in self._by_id
+            with self._conn:
+                self._upsert(metadata)
+            self._export_mtimes[video_id] = mtime_ns
+        return ('updated' if existed else 'added'), video_id
+
+    def sync_file_state(self):
+        """Refresh the present flag of every record against the filesystem."""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id, filename, present FROM videos").fetchall()
+        # Stat outside the lock, the GUI thread may need the library meanwhile
+        changes = []
+        for row in rows:
+            present = 1 if row['filename'] and os.path.exists(row['filename']) else 0
+            if present != row['present']:
+                changes.append((present, row['video_id']))
+        with self._lock:
+            if changes:
+                with self._conn:
+                    self._conn.executemany("UPDATE videos SET present = ? WHERE video_id = ?", changes)
+                for present, video_id in changes:
+                    if video_id in self._by_id:
+                        self._mark_present(video_id, present)
+
+    def set_present(self, video_id, present):
+        with self._lock:
+            if video_id not in self._by_id or (video_id not in self._missing) == bool(present):
+                return False
+            with self._conn:
+                self._conn.execute("UPDATE videos SET present = ? WHERE video_id = ?", (1 if present else 0, video_id))
+            self._mark_present(video_id, present)
+            return True
+
+    def is_present(self, video_id):
+        with self._lock:
+            return video_id in self._by_id and video_id not in self._missing
+
+    def in_archive(self, extractor_key, video_id):
+        """True when video_id from extractor_key is in the library and its file is present.
+
+        Records written before extractor_key was stored match on video_id alone. Before
+        load() has finished the database is asked directly.
+        """
+        with self._lock:
+            if self.loaded:
+                summary = self._by_id.get(video_id)
+                present = video_id not in self._missing
+            else:
+                row = self._conn.execute("""
+                    SELECT s.summary, v.present
+                    FROM video_summaries s JOIN videos v ON v.video_id = s.video_id
+                    WHERE s.video_id = ?
+                """, (video_id,)).fetchone()
+                summary = json.loads(row['summary']) if row is not None else None
+                present = row is not None and row['present']
+        if summary is None or not present:
+            return False
+        stored_key = summary.get('extractor_key')
+        return not stored_key or stored_key.lower() == extractor_key.lower()
+
+    # ---------- Content hashes ----------
+    def content_hashes(self):
+        """Return {video_id: (size, mtime_ns, digest)} of every stored media file hash."""
+        with self._lock:
+            return {row['video_id']: (row['size'], row['mtime_ns'], row['digest'])
+                    for row in self._conn.execute("SELECT video_id, size, mtime_ns, digest FROM content_hashes")}
+
+    def store_content_hashes(self, hashes):
+        """Store {video_id: (size, mtime_ns, digest)}, ignoring videos removed meanwhile."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO content_hashes (video_id, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                [(video_id,) + tuple(value) for video_id, value in hashes.items() if video_id in self._by_id])
+
+    # ---------- Search ----------
+    def build_search_index(self):
+        """Index every record once, later writes keep the index up to date.
+
+        Records are indexed WRITE_CHUNK at a time, releasing the lock between chunks. A
+        record written meanwhile indexes itself, indexing it again only replaces its documents.
+        """
+        if not self.fts_enabled:
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM library_meta WHERE key = 'search_index'").fetchone()
+            if row is not None:
+                return
+            with self._conn:
+                self._conn.execute("DELETE FROM search_fts")
+                self._conn.execute("DELETE FROM search_docs")
+        last_rowid = 0
+        while True:
+            with self._lock, self._conn:
+                rows = self._conn.execute("SELECT rowid, metadata FROM videos WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                          (last_rowid, self.WRITE_CHUNK)).fetchall()
+                for row in rows:
+                    self._index_for_search(json.loads(row['metadata']))
+            if not rows:
+                break
+            last_rowid = rows[-1]['rowid']
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO library_meta (key, value) VALUES ('search_index', '1')")
+
+    def _unindex_for_search(self, video_id):
+        if not self.fts_enabled:
+            return
+        doc_ids = [row[0] for row in self._conn.execute(
+            "SELECT doc_id FROM search_docs WHERE video_id = ?", (video_id,))]
+        if doc_ids:
+            self._conn.executemany("DELETE FROM search_fts WHERE rowid = ?", [(doc_id,) for doc_id in doc_ids])
+            self._conn.execute("DELETE FROM search_docs WHERE video_id = ?", (video_id,))
+
+    def _index_for_search(self, metadata):
+        if not self.fts_enabled:
+            return
+        video_id = metadata['video_id']
+        self._unindex_for_search(video_id)
+        cursor = self._conn.execute("INSERT INTO search_docs (video_id) VALUES (?)", (video_id,))
+        self._conn.execute(
+            "INSERT INTO search_fts (rowid, title, uploader, description) VALUES (?, ?, ?, ?)",
+            (cursor.lastrowid, metadata.get('title') or '', metadata.get('uploader') or '',
+             metadata.get('description') or ''))
+        for chapter in metadata.get('chapters') or []:
+            if not isinstance(chapter, dict) or not chapter.get('title'):
+                continue
+            try:
+                start = float(chapter.get('start', 0) or 0)
+            except (TypeError, ValueError):
+                start = 0.0
+            cursor = self._conn.execute(
+                "INSERT INTO search_docs (video_id, chapter_start, chapter_title) VALUES (?, ?, ?)",
+                (video_id, start, chapter['title']))
+            self._conn.execute(
+                "INSERT INTO search_fts (rowid, title, uploader, description) VALUES (?, ?, '', '')",
+                (cursor.lastrowid, chapter['title']))
+
+    @staticmethod
+    def search_terms(text):
+        return re.findall(r"\w+", text or "")
+
+    def _search_key(self, metadata):
+        """The terms a record contributes to the search index, equal keys index identically."""
+        chapters = tuple((chapter.get('start'), tuple(self.search_terms(chapter.get('title'))))
+                         for chapter in metadata.get('chapters') or [] if isinstance(chapter, dict))
+        return (tuple(self.search_terms(metadata.get('title'))), tuple(self.search_terms(metadata.get('uploader'))),
+                tuple(self.search_terms(metadata.get('description'))), chapters)
+
+    def search(self, text, limit=500):
+        """Prefix search over title, uploader, description and chapter titles.
+
+        Returns hits ordered by relevance, one per video, as dicts with video_id and, when
+        the best match was a chapter, chapter_start and chapter_title.
+        """
+        terms = self.search_terms(text)
+        if not terms:
+            return []
+        with self._lock:
+            if self.fts_enabled:
+                query = " ".join(f'"{term}"*' for term in terms)
+                rows = self._conn.execute("""
+                    SELECT d.video_id, d.chapter_start, d.chapter_title
+                    FROM search_fts
+                    JOIN search_docs d ON d.doc_id = search_fts.rowid
+                    WHERE search_fts MATCH ?
+                    ORDER BY bm25(search_fts, 10.0, 5.0, 1.0)
+                    LIMIT ?
+                """, (query, limit * 2)).fetchall()
+            else:
+                conditions = " AND ".join("(title LIKE ? OR uploader LIKE ?)" for _ in terms)
+                params = [value for term in terms for value in (f"%{term}%", f"%{term}%")]
+                rows = self._conn.execute(
+                    f"SELECT video_id, NULL AS chapter_start, NULL AS chapter_title FROM videos "
+                    f"WHERE {conditions} LIMIT ?", (*params, limit * 2)).fetchall()
+
+        hits = []
+        seen = set()
+        for row in rows:
+            if row['video_id'] in seen or not self.is_present(row['video_id']):
+                continue
+            seen.add(row['video_id'])
+            hit = {'video_id': row['video_id']}
+            if row['chapter_start'] is not None:
+                hit['chapter_start'] = row['chapter_start']
+                hit['chapter_title'] = row['chapter_title']
+            hits.append(hit)
+            if len(hits) >= limit:
+                break
+        return hits
+
+    # ---------- Records ----------
+    def _upsert(self, metadata, previous=None):
+        """Write a record. previous is the record before an update, used to skip unchanged search documents."""
+        filename = metadata.get('filename')
+        present = 1 if filename and os.path.exists(filename) else 0
+        self._conn.execute("""
+            INSERT OR REPLACE INTO videos (
+                video_id, filename, title, uploader, duration, thumbnail_filename,
+                download_date, viewed, progress, present, metadata
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            metadata['video_id'],
+            filename,
+            metadata.get('title'),
+            metadata.get('uploader'),
+            metadata.get('duration'),
+            metadata.get('thumbnail_filename'),
+            metadata.get('download_date', ''),
+            1 if metadata.get('viewed') else 0,
+            metadata.get('progress') or 0,
+            present,
+            json.dumps(metadata, ensure_ascii=False),
+        ))
+        summary = make_summary(metadata)
+        self._conn.execute("INSERT OR REPLACE INTO video_summaries (video_id, summary) VALUES (?, ?)",
+                           (summary['video_id'], json.dumps(summary, ensure_ascii=False)))
+        # Marking a video as viewed only adds a "✓ " to its title, which changes no search term
+        if previous is None or self._search_key(previous) != self._search_key(metadata):
+            self._index_for_search(metadata)
+        self._cache_put(summary, present)
+
+    def add_video(self, metadata):
+        with self._lock, self._conn:
+            self._upsert(metadata)
+        self.export_json(metadata['video_id'])
+
+    def update_video(self, video_id, **fields):
+        with self._lock:
+            metadata = self.get_video(video_id)
+            if metadata is None:
+                return None
+            previous = dict(metadata)
+            metadata.update(fields)
+            with self._conn:
+                self._upsert(metadata, previous)
+        self.export_json(video_id)
+        return metadata
+
+    # ---------- Bulk operations ----------
+    @contextmanager
+    def batch(self):
+        """Defer facet maintenance during many updates or removals on this thread and rebuild it once at the end.
+
+        Updating the sorted orders costs O(library size) per video, a single rebuild
+        costs about the same as a handful of them.
+        """
+        nested = self._facets_deferred
+        self._batch_state.deferred = True
+        try:
+            yield self
+        finally:
+            if not nested:
+                self._batch_state.deferred = False
+                with self._lock:
+                    self.facets.rebuild((video_id, summary) for video_id, summary in self._by_id.items()
+                                        if video_id not in self._missing)
+
+    def update_videos(self, video_ids, update):
+        """Apply update(metadata) -> fields (or None to skip) to many videos in one transaction.
+
+        Returns the video_ids that were changed.
+        """
+        updated = []
+        with self._lock, self._conn:
+            for video_id in video_ids:
+                metadata = self.get_video(video_id)
+                fields = update(metadata) if metadata is not None else None
+                if not fields:
+                    continue
+                previous = dict(metadata)
+                metadata.update(fields)
+                self._upsert(metadata, previous)
+                updated.append(video_id)
+        for video_id in updated:
+            self.export_json(video_id)
+        return updated
+
+    def remove_videos(self, video_ids):
+        """Remove many records in one transaction."""
+        video_ids = list(video_ids)
+        if self.writer is not None:
+            for video_id in video_ids:
+                self.writer.cancel(self.metadata_path(video_id))
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM videos WHERE video_id = ?", [(video_id,) for video_id in video_ids])
+            self._conn.executemany("DELETE FROM video_summaries WHERE video_id = ?",
+                                   [(video_id,) for video_id in video_ids])
+            self._conn.executemany("DELETE FROM content_hashes WHERE video_id = ?",
+                                   [(video_id,) for video_id in video_ids])
+            for video_id in video_ids:
+                self._unindex_for_search(video_id)
+                self._cache_pop(video_id)
+
+    def remove_video(self, video_id):
+        if self.writer is not None:
+            # Do not let a pending export recreate the JSON file of a deleted video
+            self.writer.cancel(self.metadata_path(video_id))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM video_summaries WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM content_hashes WHERE video_id = ?", (video_id,))
+            self._unindex_for_search(video_id)
+            self._cache_pop(video_id)
+
+    def get_video(self, video_id):
+        """Return the full metadata document of a video, read from the database."""
+        with self._lock:
+            if video_id not in self._by_id:
+                return None
+            row = self._conn.execute("SELECT metadata FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return json.loads(row['metadata']) if row is not None else None
+
+    def get_summary(self, video_id):
+        with self._lock:
+            summary = self._by_id.get(video_id)
+            return dict(summary) if summary is not None else None
+
+    def __contains__(self, video_id):
+        with self._lock:
+            return video_id in self._by_id
+
+    def get_video_by_filename(self, filename):
+        with self._lock:
+            video_id = self._by_filename.get(filename)
+            return self.get_video(video_id) if video_id is not None else None
+
+    def video_id_for_filename(self, filename):
+        with self._lock:
+            return self._by_filename.get(filename)
+
+    def filenames(self):
+        with self._lock:
+            return dict(self._by_filename)
+
+    def summary(self, video_id):
+        """Return the list row of a single present video, or None."""
+        with self._lock:
+            summary = self._by_id.get(video_id)
+            if summary is None or video_id in self._missing:
+                return None
+            return {
+                'video_id': video_id,
+                'filename': summary.get('filename'),
+                'title': summary.get('title'),
+                'uploader': summary.get('uploader'),
+                'duration': summary.get('duration'),
+                'thumbnail_filename': summary.get('thumbnail_filename'),
+                'download_date': summary.get('download_date', ''),
+            }
+
+    # ---------- Sorting and facets ----------
+    def query(self, mode='download_date', descending=True, filters=None):
+        """Return the video_ids of present videos in sort order, restricted to the facet filters."""
+        with self._lock:
+            return self.facets.query(mode, descending, filters)
+
+    def sort_key(self, video_id, mode):
+        with self._lock:
+            key = self.facets.key(video_id, mode)
+            if key is None:
+                # Not in the facets yet (changed inside a batch that has not ended), derive it from the summary
+                key = sort_key(self._by_id.get(video_id) or {}, mode)
+            return key
+
+    def matches_filters(self, video_id, filters):
+        with self._lock:
+            return self.facets.matches(video_id, filters)
+
+    def facet_counts(self, facet):
+        with self._lock:
+            return self.facets.counts(facet)
+
+    def count(self):
+        with self._lock:
+            return len(self._by_id)
@@ -0,0 +1,146 @@
+"""Library-operations benchmark.
+
+Generates synthetic libraries of the requested sizes (metadata JSON, thumbnails and
+playlists) and times the operations that scale with the library inside the real
+application under the offscreen Qt platform: the first import, loading, refreshing the
+sidebar, switching playlists, finding metadata for a file, marking a video as viewed
+and deleting videos. Peak RSS is recorded per run.
+
+    python librarybench.py --sizes 1000,10000,100000 --output library.json
+"""
+from pathlib import Path
+from benchreport import wait_until, emit_result, launch_child, write_report, peak_rss_mb
+from synthlibrary import generate_library, generate_playlists
+import argparse
+import tempfile
+import random
+import time
+import sys
+import os
+
+
+def timed(samples, metric, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    samples.setdefault(metric, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+# ---------- Child process ----------
+def run_child(operations, seed, timeout):
+    epoch_offset = time.time() - time.perf_counter()
+    spawn_time = float(os.environ["BENCH_SPAWN_TIME"])
+
+    from startupprofile import profiler
+    profiler.enable()
+    profiler.reported = True
+
+    from PyQt6.QtWidgets import QApplication
+    from mediaplayer import MediaPlayer
+
+    def mark_time(label):
+        return next((start for name, start, _ in profiler.sections if name == label), None)
+
+    app = QApplication(sys.argv)
+    MediaPlayer.VLC_EXTRA_ARGS = ['--vout=dummy', '--aout=dummy']
+    player = MediaPlayer()
+    player.show()
+
+    result = {'samples': {}}
+    if not wait_until(app, lambda: mark_time("sidebar populated") is not None, timeout):
+        result['error'] = "library did not finish loading"
+        emit_result(result)
+        return
+    samples = result['samples']
+    samples['window_shown_ms'] = [(mark_time("window shown") + epoch_offset - spawn_time) * 1000]
+    samples['library_loaded_ms'] = [(mark_time("sidebar populated") + epoch_offset - spawn_time) * 1000]
+    result['videos'] = player.library.count()
+    result['rss_after_load_mb'] = peak_rss_mb()
+
+    sidebar = player.sidebar
+    rng = random.Random(seed)
+    for _ in range(operations):
+        timed(samples, 'refresh_video_list_ms', sidebar.refresh_video_list)
+
+    names = player.playlist_store.names()
+    for name in (rng.sample(names, min(len(names), operations)) if names else []):
+        timed(samples, 'switch_playlist_ms', sidebar.playlist_combo.setCurrentText, name)
+        app.processEvents()
+    sidebar.playlist_combo.setCurrentText("All Videos")
+
+    filenames = list(player.library.filenames())
+    for path in rng.sample(filenames, min(len(filenames), operations)):
+        timed(samples, 'find_metadata_for_video_ms', player.find_metadata_for_video, path)
+    for path in rng.sample(filenames, min(len(filenames), operations)):
+        timed(samples, 'mark_video_as_viewed_ms', player.mark_video_as_viewed, path)
+        app.processEvents()
+
+    for _ in range(min(operations, sidebar.video_model.rowCount())):
+        video_data = sidebar.video_model.video_at(rng.randrange(sidebar.video_model.rowCount()))
+        timed(samples, 'delete_video_ms', sidebar.delete_video, video_data, video_data['video_id'])
+        app.processEvents()
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    emit_result(result)
+    player.close()
+    app.quit()
+
+
+# ---------- Parent process ----------
+def run_benchmark(args):
+    samples = {}
+    runs = []
+
+    def record(size, kind, result):
+        runs.append(dict(result, size=size, kind=kind))
+        if 'error' in result:
+            print(f"{size} {kind} run failed: {result['error']}")
+            return
+        for metric, values in result['samples'].items():
+            samples.setdefault(f"{size}.{kind}.{metric}", []).extend(values)
+        if result.get('peak_rss_mb') is not None:
+            samples.setdefault(f"{size}.{kind}.peak_rss_mb", []).append(result['peak_rss_mb'])
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="librarybench-") as tmp:
+            home = Path(tmp)
+            download_dir = home / "MediaPlayer"
+            print(f"Generating a library of {size} videos...")
+            documents = generate_library(download_dir / "metadata", download_dir, size, seed=args.seed)
+            generate_playlists(download_dir / "metadata", [metadata['video_id'] for metadata in documents],
+                               args.playlists, seed=args.seed, max_size=args.playlist_size)
+
+            arguments = ["--operations", args.operations, "--seed", args.seed, "--timeout", args.timeout]
+            # The first run imports the JSON files, the later ones load library.db
+            record(size, 'cold', launch_child(__file__, arguments, home, args.timeout * 10))
+            for index in range(args.runs):
+                record(size, 'warm', launch_child(__file__, arguments, home, args.timeout * 10))
+                print(f"{size} videos: run {index + 1}/{args.runs}")
+
+    parameters = {key: value for key, value in vars(args).items() if key != 'child'}
+    write_report(args.output, "library", parameters, samples, runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Library operations benchmark")
+    parser.add_argument("--sizes", default="1000,10000",
+                        type=lambda text: [int(size) for size in text.split(",") if size],
+                        help="comma separated library sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--runs", type=int, default=3, help="warm runs per size")
+    parser.add_argument("--operations", type=int, default=20, help="repetitions of every operation per run")
+    parser.add_argument("--playlists", type=int, default=10)
+    parser.add_argument("--playlist-size", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for the library to load")
+    parser.add_argument("--output", default="library-benchmark.json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.operations, args.seed, args.timeout)
+    else:
+        run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
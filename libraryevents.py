@@ -0,0 +1,15 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class LibraryEvents(QObject):
+    """Change notifications for the video library.
+
+    Anything that mutates the library publishes here and views subscribe to apply
+    targeted row updates. The bus lives on the GUI thread, so events published from
+    worker threads are delivered through queued connections.
+    """
+    video_added = pyqtSignal(str)               # video_id
+    video_updated = pyqtSignal(str, list)       # video_id, names of the changed fields
+    video_removed = pyqtSignal(str)             # video_id
+    playlist_changed = pyqtSignal(str, list, list)  # playlist name, added video_ids, removed video_ids
+    videos_changed = pyqtSignal(list)           # video_ids changed by a bulk operation, views reload once
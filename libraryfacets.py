@@ -0,0 +1,164 @@
+from bisect import bisect_left, insort
+
+
+SORT_MODES = {
+    # mode: (label, default descending)
+    'download_date': ("Date downloaded", True),
+    'upload_date': ("Date uploaded", True),
+    'duration': ("Duration", True),
+    'title': ("Title", False),
+    'uploader': ("Uploader", False),
+    'view_count': ("View count", True),
+    'viewed_date': ("Last viewed", True),
+}
+
+FACETS = {
+    # facet: label
+    'viewed': "Watched",
+    'format': "Format",
+    'extractor': "Source",
+    'uploader': "Uploader",
+    'duration': "Length",
+}
+
+DURATION_BUCKETS = [
+    (5 * 60, "Under 5 min"),
+    (20 * 60, "5 to 20 min"),
+    (60 * 60, "20 to 60 min"),
+    (None, "Over 1 hour"),
+]
+
+
+def _as_int(value, default=0):
+    try:
+        return int(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _text_key(value):
+    return (value or "").casefold()
+
+
+def sort_key(metadata, mode):
+    if mode == 'title':
+        title = metadata.get('title') or ""
+        # Viewed videos carry a "✓ " marker in their title, ignore it for ordering
+        return _text_key(title[2:] if title.startswith("✓ ") else title)
+    if mode == 'uploader':
+        return _text_key(metadata.get('uploader'))
+    if mode == 'duration':
+        return _as_int(metadata.get('duration'))
+    if mode == 'view_count':
+        return _as_int(metadata.get('view_count'), -1)
+    return metadata.get(mode) or ""
+
+
+def facet_values(metadata):
+    duration = _as_int(metadata.get('duration'))
+    if duration <= 0:
+        duration_bucket = "Unknown"
+    else:
+        duration_bucket = next(label for limit, label in DURATION_BUCKETS if limit is None or duration < limit)
+    return {
+        'viewed': "Watched" if metadata.get('viewed') else "Not watched",
+        'format': (metadata.get('format') or "unknown").capitalize(),
+        'extractor': metadata.get('extractor_key') or metadata.get('extractor') or "Unknown",
+        'uploader': metadata.get('uploader') or "Unknown",
+        'duration': duration_bucket,
+    }
+
+
+class FacetIndex:
+    """In-memory sort orders and facet memberships for the library.
+
+    Every sort mode keeps a sorted list of (key, video_id) pairs and every facet value
+    keeps the set of matching video_ids. Both are updated per video as records change,
+    so sorting, filtering and facet counts never need to read metadata again.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.keys = {}          # video_id -> {mode: key}
+        self.values = {}        # video_id -> {facet: value}
+        self.orders = {mode: [] for mode in SORT_MODES}
+        self.members = {facet: {} for facet in FACETS}  # facet -> value -> set(video_id)
+
+    def rebuild(self, items):
+        """Index many (video_id, metadata) pairs at once, sorting each order a single time."""
+        self.clear()
+        for video_id, metadata in items:
+            keys = {mode: sort_key(metadata, mode) for mode in SORT_MODES}
+            values = facet_values(metadata)
+            self.keys[video_id] = keys
+            self.values[video_id] = values
+            for mode, key in keys.items():
+                self.orders[mode].append((key, video_id))
+            for facet, value in values.items():
+                self.members[facet].setdefault(value, set()).add(video_id)
+        for order in self.orders.values():
+            order.sort()
+
+    def __contains__(self, video_id):
+        return video_id in self.keys
+
+    def add(self, video_id, metadata):
+        if video_id in self.keys:
+            self.remove(video_id)
+        keys = {mode: sort_key(metadata, mode) for mode in SORT_MODES}
+        values = facet_values(metadata)
+        self.keys[video_id] = keys
+        self.values[video_id] = values
+        for mode, key in keys.items():
+            insort(self.orders[mode], (key, video_id))
+        for facet, value in values.items():
+            self.members[facet].setdefault(value, set()).add(video_id)
+
+    def remove(self, video_id):
+        keys = self.keys.pop(video_id, None)
+        values = self.values.pop(video_id, None)
+        if keys is None:
+            return
+        for mode, key in keys.items():
+            order = self.orders[mode]
+            position = bisect_left(order, (key, video_id))
+            if position < len(order) and order[position] == (key, video_id):
+                del order[position]
+        for facet, value in values.items():
+            value_members = self.members[facet].get(value)
+            if value_members is not None:
+                value_members.discard(video_id)
+                if not value_members:
+                    del self.members[facet][value]
+
+    def key(self, video_id, mode):
+        keys = self.keys.get(video_id)
+        return keys[mode] if keys else None
+
+    def counts(self, facet):
+        """Return {value: count} for a facet."""
+        return {value: len(video_ids) for value, video_ids in self.members[facet].items()}
+
+    def matching(self, filters):
+        """Return the set of video_ids matching every {facet: value} filter, or None for no filter."""
+        allowed = None
+        for facet, value in (filters or {}).items():
+            video_ids = self.members.get(facet, {}).get(value, set())
+            allowed = set(video_ids) if allowed is None else allowed & video_ids
+        return allowed
+
+    def matches(self, video_id, filters):
+        values = self.values.get(video_id)
+        if values is None:
+            return False
+        return all(values.get(facet) == value for facet, value in (filters or {}).items())
+
+    def query(self, mode='download_date', descending=True, filters=None):
+        allowed = self.matching(filters)
+        order = self.orders[mode]
+        iterator = reversed(order) if descending else iter(order)
+        if allowed is None:
+            return [video_id for _, video_id in iterator]
+        return [video_id for _, video_id in iterator if video_id in allowed]
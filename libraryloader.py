@@ -0,0 +1,24 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class LibraryLoader(QThread):
+    """Loads the library index off the GUI thread.
+
+    Imports legacy JSON files on first start, streams list rows newest first as they are
+    read, then checks which media files are still on disk. The window is usable meanwhile.
+    """
+    chunk_loaded = pyqtSignal(list, int, int)  # list rows, records loaded so far, total records
+    library_loaded = pyqtSignal()
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+
+    def run(self):
+        try:
+            self.library.migrate_json_files()
+            self.library.load(on_chunk=self.chunk_loaded.emit)
+            self.library.sync_file_state()
+        except Exception as e:
+            print(f"Error loading library: {e}")
+        self.library_loaded.emit()
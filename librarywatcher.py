@@ -0,0 +1,143 @@
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QThread, QTimer
+from pathlib import Path
+import os
+
+
+class LibraryScan(QThread):
+    """Runs one LibraryWatcher.scan off the GUI thread."""
+
+    def __init__(self, watcher, parent=None):
+        super().__init__(parent)
+        self.watcher = watcher
+
+    def run(self):
+        self.watcher.scan()
+
+
+class LibraryWatcher(QObject):
+    """Watches the metadata and download directories and applies the differences to the library.
+
+    JSON files added, changed or removed in the metadata directory are imported into or
+    removed from the library. Media files disappearing from (or coming back to) the download
+    directory toggle the presence of their library record. Every change is published
+    on the LibraryEvents bus.
+
+    The app's own writes (exports, thumbnails, journals) land in the metadata directory
+    too, so every scan lists both directories on a LibraryScan thread; the library is
+    thread-safe and the events reach the GUI thread as queued signals.
+    """
+    SCAN_DELAY_MS = 500
+
+    def __init__(self, library, download_dir, events, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.events = events
+        self.metadata_dir = Path(library.metadata_dir)
+        self.download_dir = Path(download_dir)
+
+        # Taken by the first scan, which only records the directories
+        self.metadata_snapshot = None
+        self.media_snapshot = None
+
+        # Directory events arrive in bursts, scan once they settle
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setSingleShot(True)
+        self.scan_timer.setInterval(self.SCAN_DELAY_MS)
+        self.scan_timer.timeout.connect(self.start_scan)
+        self.scan_thread = LibraryScan(self, self)
+        self.scan_thread.finished.connect(self.on_scan_finished)
+        self.rescan = False  # changes arrived while a scan was running
+
+        self.watcher = QFileSystemWatcher(self)
+        for directory in (self.metadata_dir, self.download_dir):
+            if directory.is_dir():
+                self.watcher.addPath(str(directory))
+        self.watcher.directoryChanged.connect(self.schedule_scan)
+        self.start_scan()
+
+    def schedule_scan(self, _path=None):
+        self.scan_timer.start()
+
+    def start_scan(self):
+        if self.scan_thread.isRunning():
+            self.rescan = True
+            return
+        self.scan_thread.start()
+
+    def on_scan_finished(self):
+        if self.rescan:
+            self.rescan = False
+            self.schedule_scan()
+
+    def stop(self, timeout_ms=5000):
+        self.scan_timer.stop()
+        self.watcher.directoryChanged.disconnect(self.schedule_scan)
+        self.scan_thread.wait(timeout_ms)
+
+    def snapshot_metadata(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.metadata_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json') and entry.name != "playlists.json" and entry.is_file():
+                        snapshot[entry.name] = entry.stat().st_mtime_ns
+        except OSError as e:
+            print(f"Error scanning {self.metadata_dir}: {e}")
+        return snapshot
+
+    def snapshot_media(self):
+        snapshot = set()
+        try:
+            with os.scandir(self.download_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        snapshot.add(entry.path)
+        except OSError as e:
+            print(f"Error scanning {self.download_dir}: {e}")
+        return snapshot
+
+    def scan(self):
+        if self.metadata_snapshot is None:
+            self.metadata_snapshot = self.snapshot_metadata()
+            self.media_snapshot = self.snapshot_media()
+            return
+        try:
+            self.scan_metadata()
+            self.scan_media()
+        except Exception as e:
+            print(f"Error applying library changes: {e}")
+
+    def scan_metadata(self):
+        snapshot = self.snapshot_metadata()
+        previous = self.metadata_snapshot
+        self.metadata_snapshot = snapshot
+
+        for name, mtime_ns in snapshot.items():
+            if previous.get(name) == mtime_ns:
+                continue
+            result, video_id = self.library.import_json_file(self.metadata_dir / name)
+            if result == 'added':
+                self.events.video_added.emit(video_id)
+            elif result == 'updated':
+                self.events.video_updated.emit(video_id, [])
+
+        for name in previous.keys() - snapshot.keys():
+            video_id = Path(name).stem
+            if video_id in self.library:
+                self.library.remove_video(video_id)
+                self.events.video_removed.emit(video_id)
+
+    def scan_media(self):
+        snapshot = self.snapshot_media()
+        previous = self.media_snapshot
+        self.media_snapshot = snapshot
+
+        for path in previous - snapshot:
+            video_id = self.library.video_id_for_filename(path)
+            if video_id and self.library.set_present(video_id, False):
+                self.events.video_removed.emit(video_id)
+
+        for path in snapshot - previous:
+            video_id = self.library.video_id_for_filename(path)
+            if video_id and self.library.set_present(video_id, True):
+                self.events.video_added.emit(video_id)
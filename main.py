@@ -1,6 +1,12 @@
 import sys
 import os
 from pathlib import Path
+from startupprofile import profiler
+
+# --profile-startup prints an import/initialization timing breakdown once the library is loaded
+if "--profile-startup" in sys.argv:
+    sys.argv.remove("--profile-startup")
+    profiler.enable()
 
 # Force Qt to use XCB platform if running on Linux with Wayland
 if sys.platform.startswith('linux'):
@@ -9,14 +15,17 @@ if sys.platform.startswith('linux'):
             print("Wayland detected – forcing Qt platform to xcb for VLC embedding")
             os.environ['QT_QPA_PLATFORM'] = 'xcb'
 
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
-from mediaplayer import MediaPlayer
+with profiler.section("import PyQt6"):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QIcon
+with profiler.section("import app modules"):
+    from mediaplayer import MediaPlayer
 
 if __name__ == "__main__":
     try:
-        app = QApplication(sys.argv)
-        app.setStyle('Fusion')
+        with profiler.section("QApplication"):
+            app = QApplication(sys.argv)
+            app.setStyle('Fusion')
 
         # --- Windows: set App User Model ID (needed for taskbar icon) ---
         if sys.platform == 'win32':
@@ -33,7 +42,8 @@ if __name__ == "__main__":
         icon_path = bundle_dir / 'app_icon.png'
         app.setWindowIcon(QIcon(str(icon_path)))
 
-        player = MediaPlayer()
+        with profiler.section("MediaPlayer()"):
+            player = MediaPlayer()
         player.show()
 
         sys.exit(app.exec())
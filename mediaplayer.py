@@ -16,19 +16,33 @@ from PyQt6.QtWidgets import (
     QToolBar,
     QInputDialog,
     QMessageBox,
-    QMenu
+    QMenu,
+    QDockWidget
 )
 from pathlib import Path
 from typing import cast
-from downloadworker import DownloadWorker
+from downloadmanager import DownloadManager
+from downloadspanel import DownloadsPanel
+from downloadjournal import DownloadJournal
+from thumbnailfetcher import ThumbnailFetcher
+from library import LibraryIndex
+from librarywatcher import LibraryWatcher
+from libraryloader import LibraryLoader
+from libraryevents import LibraryEvents
+from progressjournal import ProgressJournal
+from playlists import PlaylistStore
+from filewriter import BackgroundWriter
+from bulkops import viewed_fields
+from dedup import DedupScanner
+from thumbnails import ThumbnailAtlas
 from linuxfunctions import find_vlc_plugin_path
+from startupprofile import profiler
 from sidebar import VideoSidebar, RightSidebar
-import vlc
 import sys
 import gc
 import os
-import json
-import time
+
+vlc = None  # python-vlc, imported by MediaPlayer.finish_startup
 
 if getattr(sys, 'frozen', False):
     # Running as compiled executable
@@ -38,6 +52,8 @@ else:
     build_folder = Path(__file__).parent
 
 class MediaPlayer(QMainWindow):
+    VLC_EXTRA_ARGS = []  # appended to the VLC arguments, e.g. dummy outputs for benchmarks
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -64,10 +80,25 @@ class MediaPlayer(QMainWindow):
         self.metadata_for_current_video = None
         self.metadata_file_for_current_video = None
 
-        self.setup_vlc_player()
-        self.setup_ui()
-        self.settings = QSettings("MediaPlayer", "MediaPlayer")
-        self.load_settings()
+        with profiler.section("library stores"):
+            self.file_writer = BackgroundWriter()
+            self.library = LibraryIndex(self.metadata_dir, self.file_writer)  # loaded in the background
+            self.thumbnail_atlas = ThumbnailAtlas(self.metadata_dir / "thumbnails.atlas")
+            self.library_events = LibraryEvents(self)
+            self.progress_journal = ProgressJournal(self.metadata_dir / "progress.journal")
+            self.playlist_store = PlaylistStore(self.metadata_dir / "playlists.json", self.file_writer)
+        self.download_journal = DownloadJournal(self.metadata_dir / "downloads.journal")
+        self.thumbnail_fetcher = ThumbnailFetcher()
+        self.download_manager = DownloadManager(self.download_dir, self.library, self.thumbnail_atlas,
+                                                self.library_events, self.download_journal,
+                                                self.thumbnail_fetcher, self)
+
+        # VLC, the library load and the UI timer are started by finish_startup once the window is shown
+        with profiler.section("ui"):
+            self.setup_ui()
+        with profiler.section("settings"):
+            self.settings = QSettings("MediaPlayer", "MediaPlayer")
+            self.load_settings()
 
         self.setup_connections()
         self.video_widget.installEventFilter(self)
@@ -78,9 +109,35 @@ class MediaPlayer(QMainWindow):
 
         self.ui_timer = QTimer()
         self.ui_timer.timeout.connect(self.update_ui)
-        self.ui_timer.start(100)  # Update every 100ms
+        self.pending_seek_ms = None  # applied by update_ui once the media reports its length
 
         self._closing = False
+        self._stores_closed = False
+        self._startup_finished = False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._startup_finished:
+            self._startup_finished = True
+            profiler.mark("window shown")
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        try:
+            # python-vlc loads libvlc when imported, so it is imported only once the window is shown
+            with profiler.section("import vlc"):
+                global vlc
+                import vlc
+            with profiler.section("vlc"):
+                self.setup_vlc_player()
+                self.set_volume(self.volume_slider.value())
+        except Exception as e:
+            print(f"Error starting VLC: {e}")
+            QApplication.quit()
+            return
+        self.ui_timer.start(100)  # Update every 100ms
+        self.start_library_load()
+        profiler.mark("startup finished")
 
     def setup_vlc_player(self):
         try:
@@ -92,7 +149,7 @@ class MediaPlayer(QMainWindow):
                 '--quiet',
                 '--file-caching=1000',
                 '--network-caching=1000'
-            ]
+            ] + self.VLC_EXTRA_ARGS
 
             if sys.platform == 'linux' and 'VLC_PLUGIN_PATH' not in os.environ:
                 print("VLC_PLUGIN_PATH not found. ")
@@ -183,15 +240,46 @@ class MediaPlayer(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready")
 
+        self.downloads_panel = DownloadsPanel(self.download_manager, self)
+        self.downloads_dock = QDockWidget("Downloads", self)
+        self.downloads_dock.setObjectName("DownloadsDock")
+        self.downloads_dock.setWidget(self.downloads_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.downloads_dock)
+        self.downloads_dock.hide()
+        self.download_manager.job_finished.connect(self.on_download_finished)
+        # Unfinished downloads of the last session, they start once the library is loaded
+        self.download_manager.restore()
+
         self.create_menu_bar()
         self.create_toolbar()
 
-        self.sidebar.set_metadata_dir(self.metadata_dir)
-        self.sidebar.refresh_video_list()
+        self.sidebar.set_library(self.library, self.thumbnail_atlas, self.library_events, self.playlist_store)
+        self.sidebar.begin_loading()
+        self.library_watcher = None
+        self.dedup_scanner = None
+
+    def start_library_load(self):
+        self.library_loader = LibraryLoader(self.library, self)
+        self.library_loader.chunk_loaded.connect(self.sidebar.on_library_chunk)
+        self.library_loader.library_loaded.connect(self.on_library_loaded)
+        self.library_loader.start()
+
+    def on_library_loaded(self):
+        profiler.mark("library loaded")
+        self.sidebar.on_library_loaded()
+        self.status_bar.showMessage(f"Library loaded: {self.library.count()} videos", 3000)
+        self.library_watcher = LibraryWatcher(self.library, self.download_dir, self.library_events, self)
+        if self.download_manager.active_count():
+            self.downloads_dock.show()
+        # Restored downloads wait for the library, it tells the workers what is already downloaded
+        self.download_manager.schedule()
+        profiler.mark("sidebar populated")
+        profiler.report()
 
     def create_sidebar(self):
         self.sidebar = VideoSidebar(self)
         self.sidebar.video_selected.connect(self.load_media_from_sidebar)
+        self.sidebar.video_selected_at.connect(self.load_media_from_sidebar_at)
         self.sidebar.video_deleted.connect(self.on_video_deleted)
 
     def create_menu_bar(self) -> None:
@@ -218,6 +306,10 @@ class MediaPlayer(QMainWindow):
         download_action_audio.triggered.connect(lambda checked, fmt="audio": self.download_video(fmt))
         file_menu.addAction(download_action_audio)
 
+        find_duplicates_action = QAction("Find &Duplicates...", self)
+        find_duplicates_action.triggered.connect(self.find_duplicates)
+        file_menu.addAction(find_duplicates_action)
+
         file_menu.addSeparator()
 
         self.sidebar_action = QAction("&Toggle Video Library", self)
@@ -241,6 +333,8 @@ class MediaPlayer(QMainWindow):
         view_menu.addAction(fullscreen_action)
         self.fullscreen_action = fullscreen_action
 
+        view_menu.addAction(self.downloads_dock.toggleViewAction())
+
         playback_menu = menu_bar.addMenu("&Playback")
         if not playback_menu:
             return
@@ -365,9 +459,6 @@ class MediaPlayer(QMainWindow):
             if hasattr(self, 'current_media_path') and self.current_media_path == video_path:
                 self.stop()
                 self.status_bar.showMessage("Current video was deleted", 3000)
-
-            if self.sidebar.isVisible():
-                self.sidebar.refresh_video_list()
         except Exception as e:
             print(f"Error handling video deletion: {e}")
 
@@ -375,6 +466,11 @@ class MediaPlayer(QMainWindow):
         self.load_media(video_path)
         self.play()
 
+    def load_media_from_sidebar_at(self, video_path, start_seconds):
+        self.load_media(video_path, start_seconds)
+        self.play()
+        self.status_bar.showMessage(f"Jumped to {self.format_time(int(start_seconds * 1000))}", 3000)
+
     def position_slider_pressed(self):
         self.ui_timer.stop()
 
@@ -393,6 +489,11 @@ class MediaPlayer(QMainWindow):
             position = self.vlc_player.get_time()
             duration = self.vlc_player.get_length()
 
+            if duration > 0 and self.pending_seek_ms is not None:
+                # VLC ignores set_time until the media is playing, which is when the length is known
+                position = self.pending_seek_ms
+                self.set_position(position)
+
             if duration > 0:
                 self.position_slider.blockSignals(True)
                 slider_value = int((position / duration) * 100) if duration > 0 else 0
@@ -430,32 +531,27 @@ class MediaPlayer(QMainWindow):
         return f"{minutes:02d}:{seconds:02d}"
 
     def find_metadata_for_video(self, video_path):
-        if not self.metadata_dir.exists():
-            return
-        for json_file in self.metadata_dir.glob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                if metadata.get('filename') == video_path:
-                    self.metadata_for_current_video = metadata
-                    self.metadata_file_for_current_video = json_file
-                    return
-            except Exception as e:
-                print(f"Error parsing metadata for video: {e}")
-        self.metadata_for_current_video = None
-        self.metadata_file_for_current_video = None
+        try:
+            metadata = self.library.get_video_by_filename(video_path)
+            if metadata:
+                metadata['progress'] = self.progress_journal.get(metadata['video_id'], metadata.get('progress', 0))
+        except Exception as e:
+            print(f"Error reading metadata for video: {e}")
+            metadata = None
+        self.metadata_for_current_video = metadata
+        self.metadata_file_for_current_video = self.library.metadata_path(metadata['video_id']) if metadata else None
 
     def save_current_time_progress(self):
         metadata = self.metadata_for_current_video
-        metadata_file = self.metadata_file_for_current_video
-        if not metadata_file or not metadata:
+        if not metadata or not metadata.get('video_id') or self.pending_seek_ms is not None:
+            # Until the resume seek lands the player is still near 0, keep the stored position
             return
         try:
             current_pos = self.vlc_player.get_time() // 1000  # seconds
-            if current_pos != metadata.get('progress', 0):
+            # get_time() is -1 when nothing is playing, keep the stored position then
+            if current_pos >= 0 and current_pos != metadata.get('progress', 0):
                 metadata['progress'] = current_pos
-                with open(metadata_file, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, ensure_ascii=False, indent=2)
+                self.progress_journal.record(metadata['video_id'], current_pos)
         except Exception as e:
             print(f"Error saving progress: {e}")
 
@@ -510,91 +606,68 @@ class MediaPlayer(QMainWindow):
         )
 
         if ok and url:
-            if hasattr(self, 'download_thread') and self.download_thread.isRunning():
-                reply = QMessageBox.question(self, "Download in progress",
-                                             "A download is already in progress. Do you want to stop it and start a new one?",
-                                             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-                if reply == QMessageBox.StandardButton.No:
-                    return
-                else:
-                    self.download_thread.stop()
-                    self.download_thread.wait(1000)
-
-            self.original_status_message = self.status_bar.currentMessage()
-            self.status_bar.showMessage(f"Starting {media_format} download...")
-
-            self.download_dir.mkdir(exist_ok=True)
-
-            self.download_thread = DownloadWorker(url, str(self.download_dir), media_format)
-            self.download_thread.finished.connect(self.on_download_finished)
-            self.download_thread.progress.connect(self.on_download_progress)
-            self.download_thread.metadata_saved.connect(lambda metadata: self.on_metadata_saved(metadata))
-            self.download_thread.start()
-
-    def on_metadata_saved(self, metadata):
-        if self.sidebar.isVisible():
-            self.sidebar.refresh_video_list()
-
-    def on_download_progress(self, progress_info: dict):
-        try:
-            progress_type = progress_info.get('type', '')
-
-            if progress_type == 'playlist_info':
-                total = progress_info.get('total', 0)
-                title = progress_info.get('title', 'Playlist')
-                self.status_bar.showMessage(f"Playlist: {title} ({total} videos)")
-
-            elif progress_type == 'video_info':
-                title = progress_info.get('title', 'Unknown')
-                self.status_bar.showMessage(f"Downloading: {title}")
-
-            elif progress_type == 'progress':
-                title = progress_info.get('title', 'Unknown')
-                current = progress_info.get('current', 1)
-                total = progress_info.get('total', 1)
-                percent = progress_info.get('percent', 0)
-                speed = progress_info.get('speed', '')
-                eta = progress_info.get('eta', '')
-
-                if total > 1:
-                    status_msg = f"({current}/{total}) {title} - {percent:.1f}%"
-                else:
-                    status_msg = f"{title} - {percent:.1f}%"
-
-                if speed and speed != 'N/A':
-                    status_msg += f" | {speed}"
-                if eta and eta != 'N/A':
-                    status_msg += f" | ETA: {eta}"
-
-                self.status_bar.showMessage(status_msg)
-
-            elif progress_type == 'finished_video':
-                title = progress_info.get('title', 'Unknown')
-                current = progress_info.get('current', 1)
-                total = progress_info.get('total', 1)
-
-                if total > 1:
-                    self.status_bar.showMessage(f"Completed {current}/{total}: {title}")
-                else:
-                    self.status_bar.showMessage(f"Completed: {title}")
-        except Exception as e:
-            print(f"Error in progress handler: {e}")
+            self.download_manager.add(url.strip(), media_format)
+            self.downloads_dock.show()
+            self.status_bar.showMessage(f"Queued {media_format} download", 3000)
 
-    def on_download_finished(self, success: bool, message: str):
+    def on_download_finished(self, job_id, success, message):
         try:
             if success:
                 self.status_bar.showMessage(f"✓ {message}", 5000)
             else:
                 self.status_bar.showMessage(f"✗ {message}", 5000)
-                QMessageBox.warning(self, "Download Failed", message)
-
-            QTimer.singleShot(5000, lambda: self.status_bar.showMessage(
-                self.original_status_message if hasattr(self, 'original_status_message') else "Ready"))
         except Exception as e:
             print(f"Error in download finished handler: {e}")
 
-    def load_media(self, file_path):
+    def find_duplicates(self):
+        if not self.library.loaded:
+            self.status_bar.showMessage("The library is still loading", 3000)
+            return
+        if self.dedup_scanner is not None and self.dedup_scanner.isRunning():
+            self.status_bar.showMessage("Already looking for duplicates", 3000)
+            return
+        self.status_bar.showMessage("Looking for duplicate videos...")
+        self.dedup_scanner = DedupScanner(self.library, self)
+        self.dedup_scanner.progress.connect(
+            lambda done, total: self.status_bar.showMessage(f"Looking for duplicate videos... {done}/{total}"))
+        self.dedup_scanner.completed.connect(self.on_duplicates_found)
+        self.dedup_scanner.start()
+
+    def on_duplicates_found(self, groups, stats):
+        self.status_bar.showMessage(
+            f"Duplicate scan: {stats.get('files', 0)} files, {stats.get('hashed_bytes', 0) / (1024 * 1024):.0f} MB "
+            f"hashed at {stats.get('mb_per_s', 0):.0f} MB/s", 10000)
+        if 'error' in stats:
+            QMessageBox.warning(self, "Find Duplicates", f"The scan failed: {stats['error']}")
+            return
+        if not groups:
+            QMessageBox.information(self, "Find Duplicates", "No duplicate videos found.")
+            return
+
+        # The first video of every group is kept, it was downloaded first
+        extra_ids = [video_id for group in groups for video_id in group[1:]]
+        lines = []
+        for group in groups[:20]:
+            titles = [(self.library.get_summary(video_id) or {}).get('title') or video_id for video_id in group]
+            lines.append(f"{titles[0]} ({len(group) - 1} extra)")
+        if len(groups) > 20:
+            lines.append(f"... and {len(groups) - 20} more")
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Find Duplicates")
+        box.setText(f"Found {len(extra_ids)} duplicate videos in {len(groups)} groups, "
+                    f"{stats.get('duplicate_bytes', 0) / (1024 * 1024):.0f} MB can be freed.\n\n"
+                    "The first download of every video is kept.")
+        box.setDetailedText("\n".join(lines))
+        delete_button = box.addButton(f"Delete {len(extra_ids)} Duplicates", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+        if box.clickedButton() is delete_button:
+            self.sidebar.run_bulk_operation('delete', extra_ids)
+
+    def load_media(self, file_path, start_seconds=None):
         try:
+            self.pending_seek_ms = None
             if hasattr(self, 'progress_save_timer') and self.progress_save_timer.isActive():
                 self.progress_save_timer.stop()
             self.video_widget.setAttribute(Qt.WidgetAttribute.WA_NativeWindow, True)
@@ -610,14 +683,16 @@ class MediaPlayer(QMainWindow):
 
             media = self.vlc_instance.media_new(file_path)
             self.vlc_player.set_media(media)
+            if start_seconds is not None:
+                self.pending_seek_ms = start_seconds * 1000
 
             self.find_metadata_for_video(file_path)
             metadata = self.metadata_for_current_video
             metadata_file = self.metadata_file_for_current_video
             if metadata and metadata_file:
                 progress = metadata.get('progress', 0)
-                if progress > 0:
-                    QTimer.singleShot(100, lambda p=progress: self.set_position(p * 1000))
+                if progress > 0 and start_seconds is None:
+                    self.pending_seek_ms = progress * 1000
                     self.status_bar.showMessage(f"Resuming from {self.format_time(progress * 1000)}", 3000)
                 # Pass metadata to right sidebar for chapters
                 self.right_sidebar.set_chapters(metadata)
@@ -653,30 +728,13 @@ class MediaPlayer(QMainWindow):
 
     def mark_video_as_viewed(self, video_path):
         try:
-            if not self.metadata_dir.exists():
+            metadata = self.library.get_video_by_filename(video_path)
+            if metadata is None or metadata.get('viewed', False):
+                # Unknown video or already viewed, no changes needed
                 return
-            for json_file in self.metadata_dir.glob("*.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
 
-                    if metadata.get('filename') == video_path:
-                        if metadata.get('viewed', False):
-                            # Already viewed, no changes needed
-                            break
-
-                        metadata['viewed'] = True
-                        metadata['viewed_date'] = time.strftime('%Y%m%d_%H%M%S')
-                        metadata['title'] = f"✓ {metadata['title']}"
-
-                        with open(json_file, 'w', encoding='utf-8') as f:
-                            json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                        if hasattr(self, 'sidebar') and self.sidebar.isVisible():
-                            self.sidebar.refresh_video_list()
-                        break
-                except Exception as e:
-                    print(f"Error updating metadata {json_file}: {e}")
+            self.library.update_video(metadata['video_id'], **viewed_fields(metadata, True))
+            self.library_events.video_updated.emit(metadata['video_id'], ['viewed', 'viewed_date', 'title'])
         except Exception as e:
             print(f"Error marking video as viewed: {e}")
 
@@ -705,6 +763,7 @@ class MediaPlayer(QMainWindow):
             self.position_label.setText("00:00 / 00:00")
             self.is_playing = False
             self.save_current_time_progress()
+        self.pending_seek_ms = None
 
         style = self.style()
         if style:
@@ -874,11 +933,13 @@ class MediaPlayer(QMainWindow):
             self.set_position(new_position)
 
     def set_position(self, position_ms):
+        self.pending_seek_ms = None
         if self.vlc_player.get_media():
             self.vlc_player.set_time(int(position_ms))
 
     def set_volume(self, volume):
-        self.vlc_player.audio_set_volume(volume)
+        if hasattr(self, 'vlc_player'):
+            self.vlc_player.audio_set_volume(volume)
         style = self.style()
         if not style:
             return
@@ -925,6 +986,9 @@ class MediaPlayer(QMainWindow):
         self.set_volume(volume)
         self.recent_files = self.settings.value("recentFiles", [], type=list)
 
+        self.downloads_panel.set_max_workers(
+            self.settings.value("max_downloads", DownloadManager.DEFAULT_WORKERS, type=int))
+
         sidebar_visible = self.settings.value("sidebar_visible", True, type=bool)
         self.sidebar_visible = sidebar_visible
         if not self.sidebar_visible:
@@ -935,6 +999,7 @@ class MediaPlayer(QMainWindow):
         self.settings.setValue("volume", self.volume_slider.value())
         self.settings.setValue("recentFiles", self.recent_files[-10:])  # Keep last 10
         self.settings.setValue("sidebar_visible", self.sidebar_visible)
+        self.settings.setValue("max_downloads", self.download_manager.max_workers)
 
     def increase_speed(self):
         if self.vlc_player.get_media():
@@ -1128,7 +1193,7 @@ class MediaPlayer(QMainWindow):
 
     def closeEvent(self, event):
         try:
-            if hasattr(self, '_closing'):
+            if self._closing:
                 event.accept()
                 return
             self._closing = True
@@ -1140,33 +1205,18 @@ class MediaPlayer(QMainWindow):
                 self.exit_fullscreen()
 
             if hasattr(self, 'vlc_player'):
+                # Read the position while the player still has its media, stop() resets it and release() frees it
+                self.save_current_time_progress()
                 try:
                     self.vlc_player.stop()
                     QApplication.processEvents()
                 except Exception as e:
                     print(f"Error stopping VLC player: {e}")
 
-            if hasattr(self, 'download_thread') and self.download_thread.isRunning():
-                try:
-                    try:
-                        self.download_thread.finished.disconnect()
-                        self.download_thread.progress.disconnect()
-                        self.download_thread.metadata_saved.disconnect()
-                    except (TypeError, RuntimeError):
-                        # TypeError: when trying to disconnect a non-existent connection
-                        # RuntimeError: when the signal is already disconnected
-                        pass
-                    except Exception as e:
-                        print(f"Error disconnecting signals: {e}")
-
-                    self.download_thread.stop()
-
-                    if not self.download_thread.wait(1000):  # 1 second timeout
-                        self.download_thread.terminate()
-                        if not self.download_thread.wait(500):  # 0.5 second timeout
-                            print("Thread still not terminated")
-                except Exception as e:
-                    print(f"Error stopping download thread: {e}")
+            try:
+                self.download_manager.stop_all()
+            except Exception as e:
+                print(f"Error stopping downloads: {e}")
 
             if hasattr(self, 'vlc_player'):
                 try:
@@ -1190,11 +1240,43 @@ class MediaPlayer(QMainWindow):
                 except Exception as e:
                     print(f"Error releasing subtitles: {e}")
 
-            self.save_current_time_progress()
             self.save_settings()
+            if hasattr(self, 'library_loader') and self.library_loader.isRunning():
+                self.library_loader.wait(5000)
+            if self.library_watcher is not None:
+                self.library_watcher.stop()
+            if self.dedup_scanner is not None and self.dedup_scanner.isRunning():
+                self.dedup_scanner.requestInterruption()
+                self.dedup_scanner.wait(5000)
+            bulk_operation = self.sidebar.bulk_operation
+            if bulk_operation is not None and bulk_operation.isRunning():
+                bulk_operation.requestInterruption()
+                bulk_operation.wait(5000)
+            self.close_stores()
             gc.collect()
             print("Close event completed successfully")
         except Exception as e:
             print(f"Error during close event: {e}")
         finally:
+            # Also when a step above failed, queued writes must reach the disk
+            self.close_stores()
             event.accept()
+
+    def close_stores(self):
+        """Flush and close the journals, stores and the background writer, once."""
+        if self._stores_closed:
+            return
+        self._stores_closed = True
+        for name, close in (("progress journal", self.progress_journal.close),
+                            ("download journal", self.download_journal.close),
+                            ("thumbnail fetcher", self.thumbnail_fetcher.close),
+                            ("playlists", self.playlist_store.close),
+                            ("library", self.library.close),
+                            ("thumbnail atlas", self.thumbnail_atlas.close)):
+            try:
+                close()
+            except Exception as e:
+                print(f"Error closing {name}: {e}")
+        if not self.file_writer.close():
+            print("Some metadata writes did not finish before exit")
+        print(f"File writer stats: {self.file_writer.stats()}")
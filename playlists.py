@@ -0,0 +1,264 @@
+from pathlib import Path
+from filewriter import atomic_write
+from ordered_set import OrderedSet
+import json
+
+
+class PlaylistStore:
+    """Playlists as ordered sets of video_ids, with a video_id -> playlist names reverse index.
+
+    playlists.json holds the last snapshot and every edit after it is appended to
+    playlists.journal as a single JSON line, so adding one video to a playlist of 10k
+    entries writes a few bytes instead of the whole file. Replaying the journal on top
+    of the snapshot gives the current state; every operation is idempotent, so a
+    journal replayed twice after an interrupted compaction changes nothing.
+
+    With a BackgroundWriter the journal lines and compactions are written on its
+    thread; close() waits for them.
+    """
+    COMPACT_MIN_LINES = 500
+
+    def __init__(self, path, writer=None):
+        self.path = Path(path)
+        self.writer = writer  # optional BackgroundWriter
+        self.journal_path = self.path.with_suffix(".journal")
+        self.playlists = {}      # name -> OrderedSet(video_id), in creation order
+        self.memberships = {}    # video_id -> set(name)
+        self._journal = None
+        self._line_count = 0
+        self._load()
+
+    # ---------- Loading and persistence ----------
+    def _load(self):
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for playlist in data.get("playlists", []):
+                    self._create(playlist["name"])
+                    self._add(playlist["name"], playlist.get("videos", []))
+            except Exception as e:
+                print(f"Error loading playlists: {e}")
+
+        if self.journal_path.exists():
+            try:
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        # A line cut short by a crash has no newline or does not parse, skip it
+                        if not line.endswith('\n'):
+                            continue
+                        try:
+                            self._apply(json.loads(line))
+                            self._line_count += 1
+                        except (ValueError, KeyError, IndexError, TypeError):
+                            continue
+            except Exception as e:
+                print(f"Error reading playlist journal: {e}")
+            if self._line_count:
+                self.compact()
+
+    def _apply(self, op):
+        kind, name = op[0], op[1]
+        if kind == 'create':
+            self._create(name)
+        elif kind == 'delete':
+            self._delete(name)
+        elif kind == 'rename':
+            self._rename(name, op[2])
+        elif kind == 'add':
+            self._add(name, op[2])
+        elif kind == 'remove':
+            self._remove(name, op[2])
+        elif kind == 'move':
+            self._move(name, op[2], op[3])
+
+    def _log(self, *op):
+        line = json.dumps(op, ensure_ascii=False) + "\n"
+        try:
+            if self.writer is not None:
+                self.writer.append(self.journal_path, line)
+            else:
+                if self._journal is None:
+                    self._journal = open(self.journal_path, 'a', encoding='utf-8')
+                self._journal.write(line)
+                self._journal.flush()
+            self._line_count += 1
+        except Exception as e:
+            print(f"Error writing playlist journal: {e}")
+            return
+        if self._line_count > max(self.COMPACT_MIN_LINES, len(self.playlists)):
+            self.compact()
+
+    def snapshot(self):
+        return {"playlists": [{"name": name, "videos": list(videos)} for name, videos in self.playlists.items()]}
+
+    def compact(self):
+        """Write the full state to playlists.json and start an empty journal."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        snapshot = self.snapshot()
+        payload = lambda: json.dumps(snapshot, ensure_ascii=False, indent=2)
+        try:
+            if self.writer is not None:
+                # Requested in this order, the snapshot is on disk before the journal is emptied
+                self.writer.write(self.path, payload)
+                self.writer.write(self.journal_path, b"")
+            else:
+                atomic_write(self.path, payload())
+                atomic_write(self.journal_path, b"")
+            self._line_count = 0
+        except Exception as e:
+            print(f"Error compacting playlists: {e}")
+
+    def close(self):
+        if self._line_count:
+            self.compact()
+        if self.writer is not None:
+            self.writer.flush()
+        elif self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # ---------- Queries ----------
+    def names(self):
+        return list(self.playlists)
+
+    def __contains__(self, name):
+        return name in self.playlists
+
+    def videos(self, name):
+        """Return the OrderedSet of a playlist (do not modify it), or an empty one."""
+        return self.playlists.get(name, OrderedSet())
+
+    def contains(self, name, video_id):
+        return name in self.memberships.get(video_id, ())
+
+    def playlists_for(self, video_id):
+        return set(self.memberships.get(video_id, ()))
+
+    # ---------- Edits (journaled) ----------
+    def create(self, name):
+        if name in self.playlists:
+            return False
+        self._create(name)
+        self._log('create', name)
+        return True
+
+    def delete(self, name):
+        if name not in self.playlists:
+            return False
+        self._delete(name)
+        self._log('delete', name)
+        return True
+
+    def rename(self, name, new_name):
+        if name not in self.playlists or new_name in self.playlists:
+            return False
+        self._rename(name, new_name)
+        self._log('rename', name, new_name)
+        return True
+
+    def add(self, name, video_ids):
+        """Append video_ids to a playlist, returning the ones that were not already in it."""
+        added = self._add(name, video_ids)
+        if added:
+            self._log('add', name, added)
+        return added
+
+    def remove(self, name, video_ids):
+        removed = self._remove(name, video_ids)
+        if removed:
+            self._log('remove', name, removed)
+        return removed
+
+    def move(self, name, video_id, index):
+        """Move a video to position index within its playlist."""
+        if not self._move(name, video_id, index):
+            return False
+        self._log('move', name, video_id, index)
+        return True
+
+    def remove_everywhere(self, video_id):
+        """Remove a video from every playlist, returning the names it was removed from."""
+        names = sorted(self.memberships.get(video_id, ()))
+        for name in names:
+            self.remove(name, [video_id])
+        return names
+
+    def remove_all_everywhere(self, video_ids):
+        """Remove many videos from every playlist with one journal entry per playlist.
+
+        Returns {name: removed video_ids}.
+        """
+        by_playlist = {}
+        for video_id in video_ids:
+            for name in self.memberships.get(video_id, ()):
+                by_playlist.setdefault(name, []).append(video_id)
+        return {name: self.remove(name, ids) for name, ids in by_playlist.items()}
+
+    # ---------- In-memory operations ----------
+    def _create(self, name):
+        self.playlists.setdefault(name, OrderedSet())
+
+    def _delete(self, name):
+        videos = self.playlists.pop(name, None)
+        for video_id in videos or ():
+            self._unlink(video_id, name)
+
+    def _rename(self, name, new_name):
+        if name not in self.playlists or new_name in self.playlists:
+            return
+        # Rebuild the dict so the renamed playlist keeps its position
+        self.playlists = {new_name if key == name else key: videos for key, videos in self.playlists.items()}
+        for video_id in self.playlists[new_name]:
+            names = self.memberships[video_id]
+            names.discard(name)
+            names.add(new_name)
+
+    def _add(self, name, video_ids):
+        videos = self.playlists.get(name)
+        if videos is None:
+            return []
+        added = []
+        for video_id in video_ids:
+            if video_id not in videos:
+                videos.add(video_id)
+                self.memberships.setdefault(video_id, set()).add(name)
+                added.append(video_id)
+        return added
+
+    def _remove(self, name, video_ids):
+        videos = self.playlists.get(name)
+        if videos is None:
+            return []
+        removed = [video_id for video_id in dict.fromkeys(video_ids) if video_id in videos]
+        if not removed:
+            return []
+        if len(removed) == 1:
+            videos.discard(removed[0])
+        else:
+            # One rebuild instead of a reindexing discard per video
+            gone = set(removed)
+            self.playlists[name] = OrderedSet(video_id for video_id in videos if video_id not in gone)
+        for video_id in removed:
+            self._unlink(video_id, name)
+        return removed
+
+    def _move(self, name, video_id, index):
+        videos = self.playlists.get(name)
+        if videos is None or video_id not in videos:
+            return False
+        items = list(videos)
+        items.remove(video_id)
+        index = max(0, min(index, len(items)))
+        items.insert(index, video_id)
+        self.playlists[name] = OrderedSet(items)
+        return True
+
+    def _unlink(self, video_id, name):
+        names = self.memberships.get(video_id)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.memberships[video_id]
@@ -0,0 +1,93 @@
+from pathlib import Path
+from filewriter import atomic_write
+import threading
+import queue
+
+
+class ProgressJournal:
+    """Append-only journal of resume positions.
+
+    Every record is a single "video_id<TAB>seconds" line appended by a background
+    thread, so a progress save costs a few bytes and never blocks the caller. The
+    journal is compacted into one line per video (temp file, fsync, atomic replace)
+    once it grows well past the number of videos it tracks.
+    """
+    COMPACT_MIN_LINES = 1000
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.positions = {}  # video_id -> seconds
+        self._lock = threading.Lock()
+        self._line_count = 0
+        self._load()
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ProgressJournal", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    # A line cut short by a crash has no newline or does not parse, skip it
+                    if not line.endswith('\n'):
+                        continue
+                    try:
+                        video_id, seconds = line.rstrip('\n').split('\t')
+                        self.positions[video_id] = int(seconds)
+                        self._line_count += 1
+                    except ValueError:
+                        continue
+        except Exception as e:
+            print(f"Error reading progress journal: {e}")
+
+    def get(self, video_id, default=None):
+        with self._lock:
+            return self.positions.get(video_id, default)
+
+    def record(self, video_id, seconds):
+        if seconds < 0:
+            return
+        with self._lock:
+            if self.positions.get(video_id) == seconds:
+                return
+            self.positions[video_id] = seconds
+        self._queue.put(f"{video_id}\t{int(seconds)}\n")
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self.compact()
+
+    def _run(self):
+        journal = None
+        try:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    break
+                if journal is None:
+                    journal = open(self.path, 'a', encoding='utf-8')
+                journal.write(line)
+                journal.flush()
+                self._line_count += 1
+                if self._line_count > max(self.COMPACT_MIN_LINES, 4 * len(self.positions)):
+                    journal.close()
+                    journal = None
+                    self.compact()
+        except Exception as e:
+            print(f"Error writing progress journal: {e}")
+        finally:
+            if journal is not None:
+                journal.close()
+
+    def compact(self):
+        with self._lock:
+            snapshot = dict(self.positions)
+        try:
+            atomic_write(self.path, "".join(f"{video_id}\t{int(seconds)}\n" for video_id, seconds in snapshot.items()))
+            self._line_count = len(snapshot)
+        except Exception as e:
+            print(f"Error compacting progress journal: {e}")
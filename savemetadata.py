@@ -0,0 +1,21 @@
+from yt_dlp.postprocessor.common import PostProcessor
+
+
+class SaveMetadataPP(PostProcessor):
+    """Saves an entry's metadata as soon as its file is in its final place.
+
+    Runs at the 'after_move' stage of every downloaded entry, so a playlist adds its
+    videos to the library one by one instead of after the last download, and the
+    worker never needs the info dicts of finished entries again.
+    """
+
+    def __init__(self, worker, downloader=None):
+        super().__init__(downloader)
+        self.worker = worker
+
+    def run(self, info):
+        # The library announces the new video through LibraryEvents.video_added. Errors are shown
+        # even though the downloader runs quiet, they mean the video did not reach the library
+        if self.worker.save_metadata(info, self.to_screen, lambda message: self.to_screen(message, quiet=False)):
+            self.worker.saved += 1
+        return [], info
@@ -1,12 +1,15 @@
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
-from PyQt6.QtGui import QIcon, QPixmap, QFont, QAction
+from PyQt6.QtCore import Qt, QSize, QRect, QPoint, QEvent, QModelIndex, QAbstractListModel, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon, QFont, QFontMetrics, QColor
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QToolButton, QFrame,
-    QListWidget, QListWidgetItem, QMessageBox, QHBoxLayout,
-    QPushButton, QComboBox, QMenu, QInputDialog
+    QListWidget, QListWidgetItem, QListView, QMessageBox, QHBoxLayout,
+    QPushButton, QComboBox, QMenu, QInputDialog, QStyledItemDelegate, QLineEdit,
+    QStyleOptionViewItem, QStyle, QApplication, QAbstractItemView, QProgressDialog
 )
 from pathlib import Path
-import json
+from thumbnails import ThumbnailLoader
+from bulkops import BulkOperation
+from libraryfacets import SORT_MODES, FACETS
 import os
 import sys
 
@@ -18,139 +21,279 @@ else:
     build_folder = Path(__file__).parent
 
 
-class VideoItemWidget(QWidget):
-    add_to_playlist_requested = pyqtSignal(dict)   # video_data
-    delete_video_requested = pyqtSignal(dict)      # video_data
-    play_clicked = pyqtSignal(dict)                # double-click
+def format_duration(raw_duration):
+    try:
+        duration = int(raw_duration) if raw_duration is not None else 0
+    except (TypeError, ValueError):
+        duration = 0
 
-    def __init__(self, video_data, parent=None):
-        super().__init__(parent)
-        self.video_data = video_data
+    if not duration:
+        return "Unknown"
+    minutes = duration // 60
+    seconds = duration % 60
+    if minutes > 60:
+        hours = minutes // 60
+        minutes = minutes % 60
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
 
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
-        layout.setSpacing(8)
-
-        self.thumbnail_label = QLabel()
-        self.thumbnail_label.setFixedSize(60, 40)
-        self.thumbnail_label.setStyleSheet("""
-            QLabel {
-                background-color: #2d2d2d;
-                border: 1px solid #404040;
-                border-radius: 3px;
-            }
-        """)
-        layout.addWidget(self.thumbnail_label)
-
-        text_widget = QWidget()
-        text_layout = QVBoxLayout(text_widget)
-        text_layout.setContentsMargins(0, 0, 0, 0)
-        text_layout.setSpacing(2)
-
-        self.title_label = QLabel()
-        self.title_label.setWordWrap(True)
-        self.title_label.setStyleSheet("font-weight: bold;")
-        text_layout.addWidget(self.title_label)
-
-        self.details_label = QLabel()
-        self.details_label.setStyleSheet("color: #888888; font-size: 11px;")
-        text_layout.addWidget(self.details_label)
-
-        layout.addWidget(text_widget, 1)
-
-        self.menu_button = QToolButton()
-        self.menu_button.setIcon(QIcon.fromTheme("application-menu"))
-        self.menu_button.setToolTip("Options")
-        self.menu_button.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
-        self.menu_button.setFixedSize(24, 24)
-        self.menu_button.setStyleSheet("""
-            QToolButton {
-                background-color: transparent;
-                border: none;
-            }
-            QToolButton:hover {
-                background-color: #404040;
-                border-radius: 3px;
-            }
-        """)
-
-        self.popup_menu = QMenu(self)
-        add_action = QAction("Add to playlist...", self)
-        add_action.triggered.connect(self.on_add_to_playlist)
-        delete_action = QAction("Delete", self)
-        delete_action.triggered.connect(self.on_delete)
-        self.popup_menu.addAction(add_action)
-        self.popup_menu.addSeparator()
-        self.popup_menu.addAction(delete_action)
-
-        self.menu_button.setMenu(self.popup_menu)
-        layout.addWidget(self.menu_button)
-
-        self.setMinimumHeight(50)
-        self.update_display()
-
-    def update_display(self):
-        title = self.video_data.get('title', 'Unknown Title')
-        uploader = self.video_data.get('uploader', 'Unknown Uploader')
-        raw_duration = self.video_data.get('duration', 0)
 
-        try:
-            duration = int(raw_duration) if raw_duration is not None else 0
-        except (TypeError, ValueError):
-            duration = 0
-
-        if duration:
-            minutes = duration // 60
-            seconds = duration % 60
-            if minutes > 60:
-                hours = minutes // 60
-                minutes = minutes % 60
-                duration_str = f"{hours}:{minutes:02d}:{seconds:02d}"
-            else:
-                duration_str = f"{minutes}:{seconds:02d}"
+class VideoListModel(QAbstractListModel):
+    VideoDataRole = Qt.ItemDataRole.UserRole + 1
+    MAX_SHIFTS = 64  # row shifts replayed by row_of before the row map is rebuilt
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.videos = []
+        self.descending = True  # direction of the 'sort_key' carried by every row
+        # video_id -> (row, len(_shifts) when row was recorded). Inserts and removals append
+        # (row, +1/-1) to _shifts instead of renumbering every row after them; row_of replays
+        # the later shifts, and the map is rebuilt once there are more than MAX_SHIFTS.
+        self._rows_by_id = {}
+        self._shifts = []
+        self._rows_dirty = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.videos)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.videos):
+            return None
+        video_data = self.videos[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return video_data.get('title', 'Unknown Title')
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return video_data.get('title')
+        if role == self.VideoDataRole:
+            return video_data
+        return None
+
+    @staticmethod
+    def prepare(video_data):
+        if 'chapter_start' in video_data:
+            start = format_duration(video_data['chapter_start']) if video_data['chapter_start'] else "0:00"
+            video_data['details'] = f"Chapter {start} • {video_data.get('chapter_title', '')}"
         else:
-            duration_str = "Unknown"
+            video_data['details'] = f"{video_data.get('uploader', 'Unknown Uploader')} • {format_duration(video_data.get('duration'))}"
+        return video_data
+
+    def set_videos(self, videos):
+        self.beginResetModel()
+        for video_data in videos:
+            self.prepare(video_data)
+        self.videos = videos
+        self._rows_dirty = True
+        self.endResetModel()
+
+    def append_videos(self, videos):
+        if not videos:
+            return
+        first = len(self.videos)
+        self.beginInsertRows(QModelIndex(), first, first + len(videos) - 1)
+        for video_data in videos:
+            self.prepare(video_data)
+        self.videos.extend(videos)
+        if not self._rows_dirty:
+            for row, video_data in enumerate(videos, first):
+                self._rows_by_id[video_data.get('video_id')] = (row, len(self._shifts))
+        self.endInsertRows()
+
+    def video_at(self, row):
+        if 0 <= row < len(self.videos):
+            return self.videos[row]
+        return None
+
+    def row_of(self, video_id):
+        if self._rows_dirty or len(self._shifts) > self.MAX_SHIFTS:
+            self._rows_by_id = {video_data.get('video_id'): (row, 0) for row, video_data in enumerate(self.videos)}
+            self._shifts = []
+            self._rows_dirty = False
+        entry = self._rows_by_id.get(video_id)
+        if entry is None:
+            return None
+        row, since = entry
+        if since < len(self._shifts):
+            for at, delta in self._shifts[since:]:
+                if row >= at if delta > 0 else row > at:
+                    row += delta
+            self._rows_by_id[video_id] = (row, len(self._shifts))
+        return row
+
+    def refresh_row(self, video_id):
+        row = self.row_of(video_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def insert_video(self, video_data):
+        """Insert a row at the position of its sort_key, or update it if already present."""
+        if self.row_of(video_data.get('video_id')) is not None:
+            self.update_video(video_data)
+            return
+        key = video_data.get('sort_key')
+        low, high = 0, len(self.videos)
+        while low < high:
+            mid = (low + high) // 2
+            mid_key = self.videos[mid].get('sort_key')
+            if (mid_key > key) if self.descending else (mid_key < key):
+                low = mid + 1
+            else:
+                high = mid
+        self.beginInsertRows(QModelIndex(), low, low)
+        self.videos.insert(low, self.prepare(video_data))
+        self._shifts.append((low, 1))
+        self._rows_by_id[video_data.get('video_id')] = (low, len(self._shifts))
+        self.endInsertRows()
+
+    def update_video(self, video_data):
+        row = self.row_of(video_data.get('video_id'))
+        if row is None:
+            return
+        if 'sort_key' in video_data and video_data['sort_key'] != self.videos[row].get('sort_key'):
+            self.remove_video(video_data['video_id'])
+            self.insert_video(video_data)
+            return
+        self.videos[row] = self.prepare(video_data)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
 
-        self.title_label.setText(title)
-        self.details_label.setText(f"{uploader} • {duration_str}")
+    def remove_video(self, video_id):
+        row = self.row_of(video_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.videos[row]
+        del self._rows_by_id[video_id]
+        self._shifts.append((row, -1))
+        self.endRemoveRows()
 
-        thumbnail_filename = self.video_data.get('thumbnail_filename')
-        if thumbnail_filename and 'metadata_dir' in self.video_data:
-            thumbnail_path = self.video_data['metadata_dir'] / thumbnail_filename
-            if thumbnail_path.exists():
-                try:
-                    pixmap = QPixmap(str(thumbnail_path))
-                    if not pixmap.isNull():
-                        pixmap = pixmap.scaled(60, 40, Qt.AspectRatioMode.KeepAspectRatio,
-                                               Qt.TransformationMode.SmoothTransformation)
-                        self.thumbnail_label.setPixmap(pixmap)
-                except Exception as e:
-                    print(f"Error loading thumbnail {thumbnail_path}: {e}")
 
-    def on_add_to_playlist(self):
-        self.add_to_playlist_requested.emit(self.video_data)
+class VideoItemDelegate(QStyledItemDelegate):
+    menu_requested = pyqtSignal(QModelIndex, QPoint)  # index, global position
 
-    def on_delete(self):
-        self.delete_video_requested.emit(self.video_data)
+    ROW_HEIGHT = 50
+    THUMBNAIL_SIZE = QSize(60, 40)
+    MENU_BUTTON_SIZE = 24
+
+    def __init__(self, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self.title_font = QFont()
+        self.title_font.setBold(True)
+        self.details_font = QFont()
+        self.details_font.setPixelSize(11)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def menu_button_rect(self, rect):
+        size = self.MENU_BUTTON_SIZE
+        return QRect(rect.right() - size - 5, rect.top() + (rect.height() - size) // 2, size, size)
+
+    def thumbnail_for(self, video_data):
+        thumbnail_filename = video_data.get('thumbnail_filename')
+        if not thumbnail_filename or 'metadata_dir' not in video_data:
+            return None
+        # Returns None until the background load finishes, the row keeps its placeholder meanwhile
+        return self.thumbnail_loader.get(video_data.get('video_id', ''),
+                                         video_data['metadata_dir'] / thumbnail_filename)
+
+    def paint(self, painter, option, index):
+        video_data = index.data(VideoListModel.VideoDataRole)
+        if video_data is None:
+            return
+
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+
+        # Background, alternating rows, hover and selection
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, widget)
+
+        painter.save()
+        rect = option.rect.adjusted(5, 5, -5, -5)
+
+        thumb_rect = QRect(QPoint(rect.left(), rect.top() + (rect.height() - self.THUMBNAIL_SIZE.height()) // 2),
+                           self.THUMBNAIL_SIZE)
+        painter.setPen(QColor("#404040"))
+        painter.setBrush(QColor("#2d2d2d"))
+        painter.drawRoundedRect(thumb_rect, 3, 3)
+
+        pixmap = self.thumbnail_for(video_data)
+        if pixmap is not None:
+            x = thumb_rect.left() + (thumb_rect.width() - pixmap.width()) // 2
+            y = thumb_rect.top() + (thumb_rect.height() - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+
+        menu_rect = self.menu_button_rect(option.rect)
+        text_left = thumb_rect.right() + 8
+        text_width = menu_rect.left() - 8 - text_left
+
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        text_color = option.palette.highlightedText().color() if selected else option.palette.text().color()
+
+        painter.setFont(self.title_font)
+        painter.setPen(text_color)
+        title_metrics = QFontMetrics(self.title_font)
+        title = title_metrics.elidedText(video_data.get('title', 'Unknown Title'),
+                                         Qt.TextElideMode.ElideRight, text_width)
+        title_rect = QRect(text_left, rect.top(), text_width, rect.height() // 2)
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom, title)
+
+        painter.setFont(self.details_font)
+        painter.setPen(text_color if selected else QColor("#888888"))
+        details_metrics = QFontMetrics(self.details_font)
+        details = details_metrics.elidedText(video_data.get('details', ''), Qt.TextElideMode.ElideRight, text_width)
+        details_rect = QRect(text_left, rect.top() + rect.height() // 2 + 2, text_width, rect.height() // 2 - 2)
+        painter.drawText(details_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, details)
+
+        if option.state & QStyle.StateFlag.State_MouseOver:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#404040"))
+            painter.drawRoundedRect(menu_rect, 3, 3)
+        painter.setFont(self.title_font)
+        painter.setPen(text_color)
+        painter.drawText(menu_rect, Qt.AlignmentFlag.AlignCenter, "⋮")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and self.menu_button_rect(option.rect).contains(event.position().toPoint())):
+            view = option.widget
+            menu_rect = self.menu_button_rect(option.rect)
+            if view is not None:
+                global_pos = view.viewport().mapToGlobal(menu_rect.bottomLeft())
+            else:
+                global_pos = event.globalPosition().toPoint()
+            self.menu_requested.emit(QModelIndex(index), global_pos)
+            return True
+        return super().editorEvent(event, model, option, index)
 
-    def mouseDoubleClickEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.play_clicked.emit(self.video_data)
-        super().mouseDoubleClickEvent(event)
 
 
 class VideoSidebar(QWidget):
-    video_selected = pyqtSignal(str)   # video path
-    video_deleted = pyqtSignal(str)    # video path
+    video_selected = pyqtSignal(str)            # video path
+    video_selected_at = pyqtSignal(str, float)  # video path, start position in seconds
+    video_deleted = pyqtSignal(str)             # video path
+
+    SEARCH_DELAY_MS = 150
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setObjectName("VideoSidebar")
         self.setFixedWidth(420)
 
-        self.playlists_file = None
-        self.playlists = []  # list of {"name": str, "videos": [video_id, ...]}
+        self.playlist_store = None
         self.current_playlist = "All Videos"
+        self.sort_mode = 'download_date'
+        self.sort_descending = True
+        self.facet_filters = {}  # facet -> selected value
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(5, 5, 5, 5)
@@ -181,6 +324,18 @@ class VideoSidebar(QWidget):
 
         layout.addWidget(playlist_bar)
 
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search titles, uploaders, descriptions and chapters")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
+        layout.addWidget(self.search_edit)
+
+        # Search as you type, once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.refresh_video_list)
+
         header_widget = QWidget()
         header_layout = QHBoxLayout(header_widget)
         header_layout.setContentsMargins(0, 0, 0, 0)
@@ -193,6 +348,29 @@ class VideoSidebar(QWidget):
         header_layout.addWidget(self.title_label)
         header_layout.addStretch()
 
+        self.sort_combo = QComboBox()
+        self.sort_combo.setToolTip("Sort by")
+        for mode, (label, _) in SORT_MODES.items():
+            self.sort_combo.addItem(label, mode)
+        self.sort_combo.currentIndexChanged.connect(self.on_sort_mode_changed)
+        header_layout.addWidget(self.sort_combo)
+
+        self.sort_order_button = QToolButton()
+        self.sort_order_button.setFixedSize(24, 24)
+        self.sort_order_button.clicked.connect(self.toggle_sort_order)
+        header_layout.addWidget(self.sort_order_button)
+        self.update_sort_order_button()
+
+        # Facet values and their counts change with the library, the menu is rebuilt each time it opens
+        self.filter_menu = QMenu(self)
+        self.filter_menu.aboutToShow.connect(self.build_filter_menu)
+        self.filter_button = QToolButton()
+        self.filter_button.setText("Filter")
+        self.filter_button.setToolTip("Filter videos")
+        self.filter_button.setMenu(self.filter_menu)
+        self.filter_button.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
+        header_layout.addWidget(self.filter_button)
+
         self.refresh_button = QToolButton()
         self.refresh_button.setIcon(QIcon.fromTheme("view-refresh"))
         self.refresh_button.setToolTip("Refresh list")
@@ -207,63 +385,97 @@ class VideoSidebar(QWidget):
         separator.setFrameShadow(QFrame.Shadow.Sunken)
         layout.addWidget(separator)
 
-        self.video_list = QListWidget()
-        self.video_list.setIconSize(QSize(60, 40))
+        self.video_model = VideoListModel(self)
+        self.thumbnail_loader = ThumbnailLoader(VideoItemDelegate.THUMBNAIL_SIZE, parent=self)
+        self.thumbnail_loader.thumbnail_ready.connect(self.video_model.refresh_row)
+        self.video_delegate = VideoItemDelegate(self.thumbnail_loader, self)
+        self.video_delegate.menu_requested.connect(self.show_video_menu)
+
+        self.video_list = QListView()
+        self.video_list.setModel(self.video_model)
+        self.video_list.setItemDelegate(self.video_delegate)
+        self.video_list.setUniformItemSizes(True)
+        self.video_list.setMouseTracking(True)
         self.video_list.setAlternatingRowColors(True)
-        self.video_list.setVerticalScrollMode(QListWidget.ScrollMode.ScrollPerPixel)
+        self.video_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.video_list.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.video_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.video_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.video_list.customContextMenuRequested.connect(self.on_video_context_menu)
+        self.video_list.doubleClicked.connect(self.on_video_double_clicked)
         layout.addWidget(self.video_list)
 
+        # One menu shared by every row, menu_video_data holds the row it was opened for
+        self.menu_video_data = None
+        self.video_menu = QMenu(self)
+        add_action = self.video_menu.addAction("Add to playlist...")
+        add_action.triggered.connect(lambda: self.on_add_to_playlist_requested(self.menu_video_data))
+        self.video_menu.addSeparator()
+        delete_action = self.video_menu.addAction("Delete")
+        delete_action.triggered.connect(lambda: self.delete_video_dialog(self.menu_video_data))
+
+        # Shown instead when the menu is opened on a multi-row selection, menu_video_ids holds the selection
+        self.menu_video_ids = []
+        self.bulk_menu = QMenu(self)
+        self.bulk_add_action = self.bulk_menu.addAction("Add to playlist...")
+        self.bulk_add_action.triggered.connect(lambda: self.add_selection_to_playlist(self.menu_video_ids))
+        self.bulk_remove_action = self.bulk_menu.addAction("Remove from this playlist")
+        self.bulk_remove_action.triggered.connect(lambda: self.remove_selection_from_playlist(self.menu_video_ids))
+        self.bulk_menu.addSeparator()
+        watched_action = self.bulk_menu.addAction("Mark as watched")
+        watched_action.triggered.connect(lambda: self.run_bulk_operation('mark_viewed', self.menu_video_ids))
+        unwatched_action = self.bulk_menu.addAction("Mark as unwatched")
+        unwatched_action.triggered.connect(lambda: self.run_bulk_operation('mark_unviewed', self.menu_video_ids))
+        self.bulk_menu.addSeparator()
+        self.bulk_delete_action = self.bulk_menu.addAction("Delete...")
+        self.bulk_delete_action.triggered.connect(lambda: self.delete_selection_dialog(self.menu_video_ids))
+        self.bulk_operation = None
+        self.bulk_progress = None
+
         self.info_label = QLabel("No videos found")
         self.info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.info_label.setStyleSheet("color: gray; padding: 10px;")
         layout.addWidget(self.info_label)
 
+        self.library = None
+        self.events = None
         self.metadata_dir = None
-
-    def set_metadata_dir(self, metadata_dir):
-        self.metadata_dir = Path(metadata_dir)
-        self.playlists_file = self.metadata_dir / "playlists.json"
+        self.loading = False  # True while the library is loaded in the background
+
+    def set_library(self, library, thumbnail_atlas=None, events=None, playlist_store=None):
+        self.library = library
+        self.playlist_store = playlist_store
+        self.thumbnail_loader.atlas = thumbnail_atlas
+        self.events = events
+        if events is not None:
+            events.video_added.connect(self.on_video_added)
+            events.video_updated.connect(self.on_video_updated)
+            events.video_removed.connect(self.on_video_removed)
+            events.playlist_changed.connect(self.on_playlist_contents_changed)
+            events.videos_changed.connect(self.on_videos_changed)
+        self.metadata_dir = library.metadata_dir
         self.load_playlists()
 
     # ---------- Playlist management ----------
     def load_playlists(self):
-        if not self.playlists_file or not self.playlists_file.exists():
-            self.playlists = []
-            return
-        try:
-            with open(self.playlists_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.playlists = data.get("playlists", [])
-        except Exception as e:
-            print(f"Error loading playlists: {e}")
-            self.playlists = []
-
         self.playlist_combo.blockSignals(True)
         self.playlist_combo.clear()
         self.playlist_combo.addItem("All Videos")
-        for pl in self.playlists:
-            self.playlist_combo.addItem(pl["name"])
+        if self.playlist_store is not None:
+            for name in self.playlist_store.names():
+                self.playlist_combo.addItem(name)
         self.playlist_combo.setCurrentText(self.current_playlist)
         self.playlist_combo.blockSignals(False)
 
-    def save_playlists(self):
-        if not self.playlists_file:
-            return
-        try:
-            with open(self.playlists_file, 'w', encoding='utf-8') as f:
-                json.dump({"playlists": self.playlists}, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving playlists: {e}")
-
     def create_playlist(self):
         name, ok = QInputDialog.getText(self, "New Playlist", "Playlist name:")
         if ok and name.strip():
             name = name.strip()
-            if any(pl["name"] == name for pl in self.playlists):
+            if self.playlist_store is None:
+                return
+            if name == "All Videos" or not self.playlist_store.create(name):
                 QMessageBox.warning(self, "Duplicate", "A playlist with that name already exists.")
                 return
-            self.playlists.append({"name": name, "videos": []})
-            self.save_playlists()
             self.load_playlists()
             self.playlist_combo.setCurrentText(name)
             self.refresh_video_list()
@@ -272,15 +484,13 @@ class VideoSidebar(QWidget):
         if self.current_playlist == "All Videos":
             QMessageBox.information(self, "Cannot Delete", "The 'All Videos' view cannot be deleted.")
             return
-        index = next((i for i, pl in enumerate(self.playlists) if pl["name"] == self.current_playlist), None)
-        if index is None:
+        if self.playlist_store is None or self.current_playlist not in self.playlist_store:
             return
         reply = QMessageBox.question(self, "Delete Playlist",
                                      f"Delete playlist '{self.current_playlist}'?\nThe videos themselves will NOT be deleted.",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            del self.playlists[index]
-            self.save_playlists()
+            self.playlist_store.delete(self.current_playlist)
             self.current_playlist = "All Videos"
             self.load_playlists()
             self.refresh_video_list()
@@ -295,8 +505,11 @@ class VideoSidebar(QWidget):
             QMessageBox.warning(self, "Error", "Cannot identify this video (missing video_id).")
             return
 
+        if self.playlist_store is None:
+            return
+
         if playlist_name is None:
-            names = [pl["name"] for pl in self.playlists]
+            names = self.playlist_store.names()
             if not names:
                 QMessageBox.information(self, "No Playlists", "You have no playlists. Create one first.")
                 return
@@ -306,101 +519,389 @@ class VideoSidebar(QWidget):
                 return
             playlist_name = name
 
-        for playlist in self.playlists:
-            if playlist["name"] == playlist_name:
-                if video_id not in playlist["videos"]:
-                    playlist["videos"].append(video_id)
-                    self.save_playlists()
-                else:
-                    QMessageBox.information(self, "Already in playlist", f"Video already in '{playlist_name}'")
-                break
-        if self.current_playlist == playlist_name:
-            self.refresh_video_list()
+        if playlist_name not in self.playlist_store:
+            return
+        if self.playlist_store.add(playlist_name, [video_id]):
+            self.publish_playlist_changed(playlist_name, added=[video_id])
+        else:
+            QMessageBox.information(self, "Already in playlist", f"Video already in '{playlist_name}'")
+
+    def add_videos_to_playlist(self, playlist_name, video_ids):
+        """Bulk add, publishing one change for every video that was not already in the playlist."""
+        if self.playlist_store is None:
+            return []
+        added = self.playlist_store.add(playlist_name, video_ids)
+        if added:
+            self.publish_playlist_changed(playlist_name, added=added)
+        return added
 
     def remove_video_from_all_playlists(self, video_id):
-        changed = False
-        for playlist in self.playlists:
-            if video_id in playlist["videos"]:
-                playlist["videos"].remove(video_id)
-                changed = True
-        if changed:
-            self.save_playlists()
-            if self.current_playlist != "All Videos":
-                self.refresh_video_list()
+        if self.playlist_store is None:
+            return
+        for name in self.playlist_store.remove_everywhere(video_id):
+            self.publish_playlist_changed(name, removed=[video_id])
 
-    # ---------- Video list refresh and playback ----------
-    def refresh_video_list(self):
-        self.video_list.clear()
+    def publish_playlist_changed(self, name, added=(), removed=()):
+        if self.events is not None:
+            self.events.playlist_changed.emit(name, list(added), list(removed))
+        elif self.current_playlist == name:
+            self.refresh_video_list()
+
+    # ---------- Background loading and refresh ----------
+    def begin_loading(self):
+        self.loading = True
+        self.video_model.set_videos([])
+        self.info_label.setText("Loading library...")
+        self.info_label.show()
+
+    def on_library_chunk(self, rows, loaded, total):
+        self.info_label.setText(f"Loading {loaded}/{total}")
+        # Chunks arrive newest first, only stream them into the default view
+        if self.search_edit.text().strip() or self.facet_filters \
+                or self.sort_mode != 'download_date' or not self.sort_descending:
+            return
+        self.video_model.append_videos([self.make_video_data(row) for row in rows
+                                        if self.in_current_playlist(row['video_id'])
+                                        and self.video_model.row_of(row['video_id']) is None])
+
+    def on_library_loaded(self):
+        self.loading = False
+        # Sort keys, facets and present flags are only final now
+        self.refresh_video_list()
 
-        if not self.metadata_dir or not self.metadata_dir.exists():
+    def refresh_video_list(self):
+        if not self.library:
+            self.video_model.set_videos([])
             self.info_label.setText("No metadata directory found")
             self.info_label.show()
             return
+        if self.loading:
+            # The whole list is rebuilt once loading finishes
+            return
 
-        metadata_files = list(self.metadata_dir.glob("*.json"))
-        metadata_files = [f for f in metadata_files if f.name != "playlists.json"]
+        search_text = self.search_edit.text().strip()
+        try:
+            if search_text:
+                rows = self.search_rows(search_text)  # ordered by relevance
+            else:
+                rows = self.sorted_rows()
+        except Exception as e:
+            print(f"Error loading library: {e}")
+            rows = []
 
-        if not metadata_files:
-            self.info_label.setText("No videos downloaded yet")
+        if not rows:
+            self.video_model.set_videos([])
+            self.info_label.setText("No matching videos" if search_text or self.facet_filters else "No videos downloaded yet")
             self.info_label.show()
             return
 
         self.info_label.hide()
 
-        all_videos = []
-        for metadata_file in metadata_files:
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                video_path = metadata.get('filename', '')
-                if video_path and Path(video_path).exists():
-                    video_data = {
-                        'video_path': video_path,
-                        'metadata_file': str(metadata_file),
-                        'title': metadata.get('title', 'Unknown Title'),
-                        'uploader': metadata.get('uploader', 'Unknown Uploader'),
-                        'duration': metadata.get('duration', 0),
-                        'thumbnail_filename': metadata.get('thumbnail_filename'),
-                        'metadata_dir': self.metadata_dir,
-                        'video_id': metadata.get('video_id', '')
-                    }
-                    all_videos.append((video_data, metadata))
-            except Exception as e:
-                print(f"Error loading {metadata_file}: {e}")
+        self.video_model.descending = self.sort_descending
+        all_videos = [self.make_video_data(row) for row in rows]
 
-        if self.current_playlist != "All Videos":
-            playlist = next((pl for pl in self.playlists if pl["name"] == self.current_playlist), None)
-            if playlist:
-                allowed_ids = set(playlist["videos"])
-                all_videos = [v for v in all_videos if v[0].get("video_id") in allowed_ids]
+        if self.current_playlist != "All Videos" and self.playlist_store is not None \
+                and self.current_playlist in self.playlist_store:
+            allowed_ids = self.playlist_store.videos(self.current_playlist)
+            all_videos = [v for v in all_videos if v.get("video_id") in allowed_ids]
 
-        all_videos.sort(key=lambda x: x[1].get('download_date', ''), reverse=True)
+        self.video_model.set_videos(all_videos)
 
-        for video_data, _ in all_videos:
-            item_widget = VideoItemWidget(video_data)
-            item_widget.play_clicked.connect(self.on_video_play_clicked)          # RESTORED
-            item_widget.add_to_playlist_requested.connect(self.on_add_to_playlist_requested)
-            item_widget.delete_video_requested.connect(self.delete_video_dialog)
+        if self.video_model.rowCount() == 0:
+            self.info_label.setText("No videos in this playlist")
+            self.info_label.show()
 
-            item = QListWidgetItem()
-            item.setSizeHint(item_widget.sizeHint())
-            self.video_list.addItem(item)
-            self.video_list.setItemWidget(item, item_widget)
+    def search_rows(self, text):
+        rows = []
+        for hit in self.library.search(text):
+            if self.facet_filters and not self.library.matches_filters(hit['video_id'], self.facet_filters):
+                continue
+            row = self.library.summary(hit['video_id'])
+            if row is None:
+                continue
+            if 'chapter_start' in hit:
+                row['chapter_start'] = hit['chapter_start']
+                row['chapter_title'] = hit['chapter_title']
+            rows.append(row)
+        return rows
+
+    def on_search_text_changed(self, _text):
+        self.search_timer.start()
+
+    # ---------- Sorting and filtering ----------
+    def on_sort_mode_changed(self, _index):
+        self.sort_mode = self.sort_combo.currentData()
+        self.sort_descending = SORT_MODES[self.sort_mode][1]
+        self.update_sort_order_button()
+        self.refresh_video_list()
 
-        if self.video_list.count() == 0:
-            self.info_label.setText("No videos in this playlist")
+    def toggle_sort_order(self):
+        self.sort_descending = not self.sort_descending
+        self.update_sort_order_button()
+        self.refresh_video_list()
+
+    def update_sort_order_button(self):
+        self.sort_order_button.setText("↓" if self.sort_descending else "↑")
+        self.sort_order_button.setToolTip("Descending" if self.sort_descending else "Ascending")
+
+    def build_filter_menu(self):
+        self.filter_menu.clear()
+        if not self.library:
+            return
+        for facet, label in FACETS.items():
+            submenu = self.filter_menu.addMenu(label)
+            counts = self.library.facet_counts(facet)
+            for value in sorted(counts, key=str.casefold):
+                action = submenu.addAction(f"{value} ({counts[value]})")
+                action.setCheckable(True)
+                action.setChecked(self.facet_filters.get(facet) == value)
+                action.triggered.connect(lambda checked, f=facet, v=value: self.set_facet_filter(f, v if checked else None))
+        self.filter_menu.addSeparator()
+        clear_action = self.filter_menu.addAction("Clear filters")
+        clear_action.setEnabled(bool(self.facet_filters))
+        clear_action.triggered.connect(self.clear_facet_filters)
+
+    def set_facet_filter(self, facet, value):
+        if value is None:
+            self.facet_filters.pop(facet, None)
+        else:
+            self.facet_filters[facet] = value
+        self.update_filter_button()
+        self.refresh_video_list()
+
+    def clear_facet_filters(self):
+        self.facet_filters = {}
+        self.update_filter_button()
+        self.refresh_video_list()
+
+    def update_filter_button(self):
+        count = len(self.facet_filters)
+        self.filter_button.setText(f"Filter ({count})" if count else "Filter")
+        self.filter_button.setToolTip("\n".join(f"{FACETS[facet]}: {value}" for facet, value in self.facet_filters.items())
+                                      or "Filter videos")
+
+    def sorted_rows(self):
+        rows = []
+        for video_id in self.library.query(self.sort_mode, self.sort_descending, self.facet_filters):
+            row = self.library.summary(video_id)
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def make_video_data(self, row):
+        video_data = {
+            'video_path': row['filename'],
+            'metadata_file': str(self.library.metadata_path(row['video_id'])),
+            'title': row['title'] or 'Unknown Title',
+            'uploader': row['uploader'] or 'Unknown Uploader',
+            'duration': row['duration'] or 0,
+            'thumbnail_filename': row['thumbnail_filename'],
+            'download_date': row['download_date'] or '',
+            'metadata_dir': self.metadata_dir,
+            'video_id': row['video_id'],
+            'sort_key': (self.library.sort_key(row['video_id'], self.sort_mode), row['video_id'])
+        }
+        if row.get('chapter_start') is not None:
+            video_data['chapter_start'] = row['chapter_start']
+            video_data['chapter_title'] = row.get('chapter_title', '')
+        return video_data
+
+    def in_current_playlist(self, video_id):
+        if self.current_playlist == "All Videos":
+            return True
+        if self.playlist_store is None or self.current_playlist not in self.playlist_store:
+            return True
+        return self.playlist_store.contains(self.current_playlist, video_id)
+
+    # ---------- Incremental updates from LibraryEvents ----------
+    DISPLAYED_FIELDS = {'title', 'uploader', 'duration', 'thumbnail_filename', 'filename', 'download_date'}
+    # Fields that can move a row under some sort mode or facet filter
+    ORDERING_FIELDS = {'viewed', 'viewed_date', 'upload_date', 'view_count', 'format', 'extractor', 'extractor_key'}
+
+    def on_video_added(self, video_id):
+        if self.loading:
+            return
+        if self.search_edit.text().strip():
+            # Results are ordered by relevance, run the search again rather than guessing a position
+            self.search_timer.start()
+            return
+        row = self.library.summary(video_id) if self.library else None
+        if row is None or not self.in_current_playlist(video_id):
+            return
+        if self.facet_filters and not self.library.matches_filters(video_id, self.facet_filters):
+            return
+        self.video_model.insert_video(self.make_video_data(row))
+        self.info_label.hide()
+
+    def on_video_updated(self, video_id, fields):
+        if self.loading:
+            return
+        if fields and not (self.DISPLAYED_FIELDS | self.ORDERING_FIELDS).intersection(fields):
+            return
+        row = self.library.summary(video_id) if self.library else None
+        if row is None:
+            self.on_video_removed(video_id)
+            return
+        if not fields or 'thumbnail_filename' in fields:
+            self.thumbnail_loader.invalidate(video_id)
+        if self.video_model.row_of(video_id) is None:
+            self.on_video_added(video_id)
+        elif self.search_edit.text().strip():
+            self.search_timer.start()
+        elif self.facet_filters and not self.library.matches_filters(video_id, self.facet_filters):
+            self.on_video_removed(video_id)
+        else:
+            self.video_model.update_video(self.make_video_data(row))
+
+    # More changed rows than this reload the list instead of being applied one by one
+    BULK_REFRESH_THRESHOLD = 50
+
+    def on_playlist_contents_changed(self, name, added, removed):
+        if name != self.current_playlist:
+            return
+        if len(added) + len(removed) > self.BULK_REFRESH_THRESHOLD:
+            self.refresh_video_list()
+            return
+        for video_id in added:
+            self.on_video_added(video_id)
+        for video_id in removed:
+            self.on_video_removed(video_id)
+
+    def on_video_removed(self, video_id):
+        self.video_model.remove_video(video_id)
+        if self.video_model.rowCount() == 0:
+            self.info_label.setText("No videos downloaded yet" if self.current_playlist == "All Videos"
+                                    else "No videos in this playlist")
             self.info_label.show()
 
+    # ---------- Playback ----------
+    def on_video_double_clicked(self, index):
+        video_data = self.video_model.video_at(index.row())
+        if video_data:
+            self.on_video_play_clicked(video_data)
+
     def on_video_play_clicked(self, video_data):
         video_path = video_data.get('video_path')
-        if video_path:
+        if not video_path:
+            return
+        if video_data.get('chapter_start') is not None:
+            # Chapter search hit, start playback at that chapter
+            self.video_selected_at.emit(video_path, float(video_data['chapter_start']))
+        else:
             self.video_selected.emit(video_path)
 
+    def on_video_context_menu(self, pos):
+        index = self.video_list.indexAt(pos)
+        if index.isValid():
+            self.show_video_menu(index, self.video_list.viewport().mapToGlobal(pos))
+
+    def on_videos_changed(self, _video_ids):
+        if not self.loading:
+            self.refresh_video_list()
+
+    def show_video_menu(self, index, global_pos):
+        video_data = self.video_model.video_at(index.row())
+        if video_data is None:
+            return
+        selected = self.selected_video_ids()
+        if len(selected) > 1 and video_data['video_id'] in selected:
+            self.menu_video_ids = selected
+            count = len(selected)
+            self.bulk_add_action.setText(f"Add {count} videos to playlist...")
+            self.bulk_remove_action.setVisible(self.current_playlist != "All Videos")
+            self.bulk_delete_action.setText(f"Delete {count} videos...")
+            self.bulk_menu.exec(global_pos)
+            return
+        self.menu_video_data = video_data
+        self.video_menu.exec(global_pos)
+
+    def selected_video_ids(self):
+        rows = sorted(index.row() for index in self.video_list.selectionModel().selectedRows())
+        return [self.video_model.video_at(row)['video_id'] for row in rows if self.video_model.video_at(row)]
+
+    # ---------- Bulk operations on the selection ----------
+    def add_selection_to_playlist(self, video_ids):
+        if self.playlist_store is None or not video_ids:
+            return
+        names = self.playlist_store.names()
+        if not names:
+            QMessageBox.information(self, "No Playlists", "You have no playlists. Create one first.")
+            return
+        name, ok = QInputDialog.getItem(self, "Add to Playlist", "Select playlist:", names, 0, False)
+        if ok and name:
+            added = self.add_videos_to_playlist(name, video_ids)
+            QMessageBox.information(self, "Added to playlist",
+                                    f"Added {len(added)} videos to '{name}', {len(video_ids) - len(added)} were already in it.")
+
+    def remove_selection_from_playlist(self, video_ids):
+        if self.playlist_store is None or self.current_playlist not in self.playlist_store:
+            return
+        removed = self.playlist_store.remove(self.current_playlist, video_ids)
+        if removed:
+            self.publish_playlist_changed(self.current_playlist, removed=removed)
+
+    def delete_selection_dialog(self, video_ids):
+        if not video_ids:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Delete Videos",
+            f"Are you sure you want to delete {len(video_ids)} videos?\n\nTheir video files, metadata files and thumbnails will be deleted and they will be removed from all playlists.\n\nThis action cannot be undone.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.run_bulk_operation('delete', video_ids)
+
+    BULK_LABELS = {
+        'delete': "Deleting videos...",
+        'mark_viewed': "Marking videos as watched...",
+        'mark_unviewed': "Marking videos as unwatched...",
+    }
+
+    def run_bulk_operation(self, action, video_ids):
+        if not self.library or not video_ids:
+            return
+        if self.bulk_operation is not None and self.bulk_operation.isRunning():
+            QMessageBox.information(self, "Busy", "Another operation on the library is still running.")
+            return
+        self.bulk_operation = BulkOperation(self.library, action, video_ids, self)
+        # Only appears when the operation takes longer than half a second
+        self.bulk_progress = QProgressDialog(self.BULK_LABELS[action], "Cancel", 0, len(video_ids), self)
+        self.bulk_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.bulk_progress.setMinimumDuration(500)
+        self.bulk_progress.canceled.connect(self.bulk_operation.requestInterruption)
+        self.bulk_operation.progress.connect(lambda done, _total: self.bulk_progress.setValue(done))
+        self.bulk_operation.completed.connect(self.on_bulk_operation_completed)
+        self.bulk_operation.start()
+
+    def on_bulk_operation_completed(self, action, processed, errors):
+        if self.bulk_progress is not None:
+            self.bulk_progress.close()
+            self.bulk_progress = None
+        if action == 'delete':
+            for video_id in processed:
+                self.thumbnail_loader.invalidate(video_id, remove_from_atlas=True)
+            if self.playlist_store is not None:
+                self.playlist_store.remove_all_everywhere(processed)
+            for video_path in self.bulk_operation.deleted_paths:
+                self.video_deleted.emit(video_path)
+        if errors:
+            QMessageBox.warning(self, "Bulk Operation",
+                                "Some videos could not be processed:\n" + "\n".join(errors[:20]))
+        if processed:
+            if self.events is not None:
+                self.events.videos_changed.emit(processed)
+            else:
+                self.refresh_video_list()
+
     def on_add_to_playlist_requested(self, video_data):
-        self.add_video_to_playlist(video_data)
+        if video_data:
+            self.add_video_to_playlist(video_data)
 
     def delete_video_dialog(self, video_data):
+        if not video_data:
+            return
         video_path = video_data.get('video_path', '')
         metadata_file = video_data.get('metadata_file', '')
         title = video_data.get('title', 'Unknown Video')
@@ -458,6 +959,8 @@ class VideoSidebar(QWidget):
                         files_failed.append(f"Thumbnail: {str(e)}")
 
             if video_id:
+                self.library.remove_video(video_id)
+                self.thumbnail_loader.invalidate(video_id, remove_from_atlas=True)
                 self.remove_video_from_all_playlists(video_id)
 
             if files_failed:
@@ -465,7 +968,10 @@ class VideoSidebar(QWidget):
                 QMessageBox.warning(self, "Deletion Warning", error_msg)
 
             self.video_deleted.emit(video_path)
-            self.refresh_video_list()
+            if self.events is not None:
+                self.events.video_removed.emit(video_id)
+            else:
+                self.refresh_video_list()
         except Exception as e:
             QMessageBox.critical(self, "Deletion Error", f"Error deleting video: {str(e)}")
 
@@ -0,0 +1,149 @@
+"""Startup and time-to-first-frame benchmark.
+
+Launches the player under the offscreen Qt platform against a synthetic library and
+records, over many runs, the time to a visible window, to a fully loaded library, from
+opening a file to its first decoded frame, and of seeks. Cold runs start from freshly
+generated JSON metadata (no library.db yet), warm runs reuse an already imported library.
+
+    python startupbench.py --runs 20 --videos 5000 --output startup.json
+"""
+from pathlib import Path
+from benchreport import wait_until, emit_result, launch_child, write_report
+from synthlibrary import generate_library, generate_media
+import argparse
+import tempfile
+import shutil
+import random
+import time
+import sys
+import os
+
+
+# ---------- Child process: one instrumented application run ----------
+def run_child(media_files, seeks, timeout):
+    epoch_offset = time.time() - time.perf_counter()
+    spawn_time = float(os.environ["BENCH_SPAWN_TIME"])
+
+    from startupprofile import profiler
+    profiler.enable()
+    profiler.reported = True  # keep the breakdown out of stdout, it is returned below instead
+
+    with profiler.section("import PyQt6"):
+        from PyQt6.QtWidgets import QApplication
+    with profiler.section("import app modules"):
+        from mediaplayer import MediaPlayer
+
+    def mark_time(label):
+        return next((start for name, start, _ in profiler.sections if name == label), None)
+
+    def since_spawn(perf_time):
+        return (perf_time + epoch_offset - spawn_time) * 1000
+
+    app = QApplication(sys.argv)
+    MediaPlayer.VLC_EXTRA_ARGS = ['--vout=dummy', '--aout=dummy']
+    player = MediaPlayer()
+    player.show()
+
+    result = {'open_to_first_frame_ms': [], 'seek_ms': []}
+    if not wait_until(app, lambda: mark_time("sidebar populated") is not None, timeout):
+        result['error'] = "library did not finish loading"
+    else:
+        result['window_shown_ms'] = since_spawn(mark_time("window shown"))
+        result['library_loaded_ms'] = since_spawn(mark_time("sidebar populated"))
+        result['videos'] = player.library.count()
+
+    rng = random.Random(0)
+    for path in media_files:
+        start = time.perf_counter()
+        player.load_media(str(path))
+        player.play()
+        vlc_player = player.vlc_player
+        if not wait_until(app, lambda: vlc_player.has_vout() > 0 and vlc_player.get_time() > 0, timeout):
+            result.setdefault('errors', []).append(f"no frame from {path}")
+            continue
+        result['open_to_first_frame_ms'].append((time.perf_counter() - start) * 1000)
+
+        length = vlc_player.get_length()
+        for _ in range(seeks if length > 0 else 0):
+            target = rng.randint(0, int(length * 0.8))
+            start = time.perf_counter()
+            vlc_player.set_time(target)
+            if wait_until(app, lambda: abs(vlc_player.get_time() - target) < 500, timeout):
+                result['seek_ms'].append((time.perf_counter() - start) * 1000)
+        player.stop()
+
+    result['profile'] = [{'label': label, 'start_ms': since_spawn(start),
+                          'duration_ms': seconds * 1000 if seconds is not None else None}
+                         for label, start, seconds in profiler.sections]
+    emit_result(result)
+    player.close()
+    app.quit()
+
+
+# ---------- Parent process: prepare libraries, launch runs, aggregate ----------
+def launch(home, media_files, seeks, timeout):
+    return launch_child(__file__, ["--seeks", seeks, "--timeout", timeout] + list(media_files), home, timeout * 10)
+
+
+def run_benchmark(args):
+    samples = {}
+    runs = []
+
+    def record(kind, result):
+        runs.append(dict(result, kind=kind))
+        if 'error' in result:
+            print(f"{kind} run failed: {result['error']}")
+            return
+        for metric in ('window_shown_ms', 'library_loaded_ms'):
+            samples.setdefault(f"{kind}.{metric}", []).append(result[metric])
+        for metric in ('open_to_first_frame_ms', 'seek_ms'):
+            samples.setdefault(f"{kind}.{metric}", []).extend(result[metric])
+
+    with tempfile.TemporaryDirectory(prefix="startupbench-") as tmp:
+        tmp = Path(tmp)
+        media_dir = tmp / "media"
+        media_files = generate_media(media_dir, args.media, args.media_duration)
+        template = tmp / "template" / "MediaPlayer" / "metadata"
+        print(f"Generating a library of {args.videos} videos...")
+        generate_library(template, media_dir, args.videos, seed=args.seed, media_files=media_files)
+
+        for index in range(args.runs):
+            home = tmp / f"cold-{index}"
+            shutil.copytree(tmp / "template", home)
+            record('cold', launch(home, media_files, args.seeks, args.timeout))
+            shutil.rmtree(home, ignore_errors=True)
+            print(f"cold run {index + 1}/{args.runs}")
+
+        home = tmp / "warm"
+        shutil.copytree(tmp / "template", home)
+        launch(home, [], 0, args.timeout)  # imports the JSON files, not measured
+        for index in range(args.runs):
+            record('warm', launch(home, media_files, args.seeks, args.timeout))
+            print(f"warm run {index + 1}/{args.runs}")
+
+    parameters = {key: value for key, value in vars(args).items() if key not in ('child', 'media_files')}
+    write_report(args.output, "startup", parameters, samples, runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup and time-to-first-frame benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="measured runs per mode (cold and warm)")
+    parser.add_argument("--videos", type=int, default=2000, help="videos in the synthetic library")
+    parser.add_argument("--media", type=int, default=3, help="generated media files to open in every run")
+    parser.add_argument("--media-duration", type=int, default=20, help="length of each media file in seconds")
+    parser.add_argument("--seeks", type=int, default=5, help="seeks per opened media file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for any single step")
+    parser.add_argument("--output", default="startup-benchmark.json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("media_files", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.media_files, args.seeks, args.timeout)
+    else:
+        run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+import time
+
+
+class StartupProfiler:
+    """Collects an import/initialization timing breakdown for --profile-startup.
+
+    Disabled by default, in which case section() and mark() cost next to nothing.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.sections = []  # (label, start, seconds), seconds is None for a point in time
+        self.reported = False
+
+    def enable(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def section(self, label):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append((label, start, time.perf_counter() - start))
+
+    def mark(self, label):
+        if self.enabled:
+            self.sections.append((label, time.perf_counter(), None))
+
+    def report(self):
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print("Startup profile (ms)      start  duration")
+        for label, start, seconds in self.sections:
+            duration = f"{seconds * 1000:9.1f}" if seconds is not None else " " * 9
+            print(f"  {label:<22}{(start - self.origin) * 1000:7.1f} {duration}")
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,186 @@
+from pathlib import Path
+import subprocess
+import argparse
+import shutil
+import random
+import string
+import json
+import time
+
+
+WORDS = (
+    "video music live tutorial review game news travel cooking science history "
+    "podcast interview trailer concert lecture guide build setup episode highlights "
+    "analysis explained beginner advanced remix official part update vlog"
+).split()
+
+UPLOADERS = [f"Channel {name}" for name in (
+    "Alpha", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot", "Golf", "Hotel",
+    "India", "Juliett", "Kilo", "Lima", "Mike", "November", "Oscar", "Papa",
+)]
+
+EXTRACTORS = ["Youtube", "Youtube", "Youtube", "Vimeo", "Twitch", "Soundcloud"]
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def make_metadata(rng, index, filename, description_words=150, chapter_count=8):
+    """Return a metadata document shaped like the ones DownloadWorker.save_metadata writes."""
+    video_id = "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(11))
+    duration = rng.randint(30, 3 * 60 * 60)
+    downloaded = time.gmtime(1_600_000_000 + index * 3600 + rng.randint(0, 3599))
+    uploaded = time.gmtime(1_500_000_000 + rng.randint(0, 100_000_000))
+    extractor = rng.choice(EXTRACTORS)
+    chapters = []
+    if chapter_count and rng.random() < 0.4:
+        step = duration / chapter_count
+        chapters = [{'title': words(rng, rng.randint(2, 5)).capitalize(), 'start': round(i * step, 1),
+                     'end': round((i + 1) * step, 1)} for i in range(chapter_count)]
+    return {
+        'title': words(rng, rng.randint(3, 10)).capitalize(),
+        'upload_date': time.strftime('%Y%m%d', uploaded),
+        'duration': duration,
+        'uploader': rng.choice(UPLOADERS),
+        'thumbnail': None,
+        'view_count': int(rng.paretovariate(1.2) * 100),
+        'like_count': rng.randint(0, 10_000),
+        'description': words(rng, rng.randint(description_words // 2, description_words * 2)),
+        'webpage_url': f"https://example.com/watch?v={video_id}",
+        'extractor': extractor.lower(),
+        'extractor_key': extractor,
+        'format': "audio" if rng.random() < 0.2 else "video",
+        'download_date': time.strftime('%Y%m%d_%H%M%S', downloaded),
+        'video_id': video_id,
+        'viewed': rng.random() < 0.3,
+        'viewed_date': None,
+        'progress': 0,
+        'chapters': chapters,
+        'filename': str(filename),
+        'filename_short': Path(filename).name,
+        'thumbnail_filename': None,
+        'thumbnail_path': None,
+    }
+
+
+def thumbnail_templates(count=8, width=320, height=180):
+    """Return JPEG bytes of count solid-colour thumbnails, or [] when Qt is not available."""
+    try:
+        from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+        from PyQt6.QtGui import QImage, QColor
+    except ImportError:
+        return []
+    templates = []
+    for index in range(count):
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.fill(QColor.fromHsv(index * 360 // count, 160, 200))
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "JPG", 85)
+        buffer.close()
+        templates.append(bytes(data))
+    return templates
+
+
+def generate_library(metadata_dir, media_dir, count, seed=0, media_files=(), description_words=150,
+                     thumbnails=True):
+    """Write count per-video JSON files (the legacy import format) into metadata_dir.
+
+    The first videos point at media_files; the others get empty placeholder files in
+    media_dir so they count as present. With thumbnails every video also gets a
+    {video_id}.jpg next to its JSON, as DownloadWorker.save_metadata writes them.
+    Returns the list of metadata documents.
+    """
+    rng = random.Random(seed)
+    metadata_dir = Path(metadata_dir)
+    media_dir = Path(media_dir)
+    metadata_dir.mkdir(parents=True, exist_ok=True)
+    media_dir.mkdir(parents=True, exist_ok=True)
+    media_files = list(media_files)
+    templates = thumbnail_templates() if thumbnails else []
+    documents = []
+    for index in range(count):
+        if index < len(media_files):
+            filename = Path(media_files[index])
+        else:
+            filename = media_dir / f"placeholder_{index:06d}.mp4"
+            filename.touch()
+        metadata = make_metadata(rng, index, filename, description_words)
+        if templates:
+            thumbnail_path = metadata_dir / f"{metadata['video_id']}.jpg"
+            thumbnail_path.write_bytes(rng.choice(templates))
+            metadata['thumbnail'] = f"https://example.com/thumbnails/{metadata['video_id']}.jpg"
+            metadata['thumbnail_filename'] = thumbnail_path.name
+            metadata['thumbnail_path'] = str(thumbnail_path)
+        with open(metadata_dir / f"{metadata['video_id']}.json", 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        documents.append(metadata)
+    return documents
+
+
+def generate_playlists(metadata_dir, video_ids, count, seed=0, max_size=None):
+    """Write playlists.json with count playlists of random, partly overlapping subsets of video_ids."""
+    rng = random.Random(seed)
+    video_ids = list(video_ids)
+    max_size = min(max_size or len(video_ids), len(video_ids))
+    playlists = []
+    for index in range(count):
+        size = rng.randint(min(10, max_size), max_size) if max_size else 0
+        playlists.append({"name": f"Playlist {index + 1}", "videos": rng.sample(video_ids, size)})
+    with open(Path(metadata_dir) / "playlists.json", 'w', encoding='utf-8') as f:
+        json.dump({"playlists": playlists}, f, ensure_ascii=False, indent=2)
+    return playlists
+
+
+def generate_media(media_dir, count, duration=20):
+    """Encode count short test videos with ffmpeg, returns their paths (empty without ffmpeg)."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        print("ffmpeg not found, skipping media generation")
+        return []
+    media_dir = Path(media_dir)
+    media_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = media_dir / f"sample_{index:03d}.mp4"
+        if not path.exists():
+            subprocess.run([
+                ffmpeg, "-loglevel", "error", "-y",
+                "-f", "lavfi", "-i", f"testsrc2=duration={duration}:size=1280x720:rate=30",
+                "-f", "lavfi", "-i", f"sine=frequency={220 + 110 * index}:duration={duration}",
+                "-c:v", "libx264", "-preset", "veryfast", "-g", "60", "-pix_fmt", "yuv420p",
+                "-c:a", "aac", "-shortest", str(path),
+            ], check=True)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic media library")
+    parser.add_argument("download_dir", help="library root, laid out like ~/MediaPlayer (metadata/ inside)")
+    parser.add_argument("--videos", type=int, default=1000)
+    parser.add_argument("--playlists", type=int, default=10)
+    parser.add_argument("--playlist-size", type=int, default=None, help="largest playlist, defaults to the library size")
+    parser.add_argument("--description-words", type=int, default=150)
+    parser.add_argument("--no-thumbnails", action="store_true")
+    parser.add_argument("--media", type=int, default=0, help="real test videos to encode with ffmpeg")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    download_dir = Path(args.download_dir)
+    metadata_dir = download_dir / "metadata"
+    start = time.perf_counter()
+    media_files = generate_media(download_dir, args.media) if args.media else []
+    documents = generate_library(metadata_dir, download_dir, args.videos, seed=args.seed, media_files=media_files,
+                                 description_words=args.description_words, thumbnails=not args.no_thumbnails)
+    if args.playlists:
+        generate_playlists(metadata_dir, [metadata['video_id'] for metadata in documents], args.playlists,
+                           seed=args.seed, max_size=args.playlist_size)
+    print(f"Generated {len(documents)} videos and {args.playlists} playlists in {download_dir} "
+          f"({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+from pathlib import Path
+from urllib.parse import urlsplit, urljoin
+import http.client
+import threading
+import random
+import queue
+import time
+import os
+
+
+class FetchError(Exception):
+    def __init__(self, message, retry=False):
+        super().__init__(message)
+        self.retry = retry  # worth trying again later (network error, 5xx, 429)
+
+
+class ThumbnailFetcher:
+    """Downloads thumbnails on a few background threads, away from the media downloads.
+
+    Every thread keeps one HTTP connection per host alive, so the thumbnails of a
+    playlist, which usually come from the same CDN host, reuse a handful of
+    connections. Requests time out, transient failures are retried with exponential
+    backoff, and only image/* responses are written to disk (temp file, then replace).
+    """
+    USER_AGENT = "MediaPlayer thumbnail fetcher"
+    MAX_REDIRECTS = 5
+    MAX_BYTES = 10 * 1024 * 1024
+
+    def __init__(self, workers=4, timeout=10.0, retries=3, backoff=0.5):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._threads = []  # started by the first fetch, a session without downloads never starts them
+
+    def fetch(self, url, path, callback=None):
+        """Queue url to be saved at path, callback(path, error) is called on a fetcher thread."""
+        with self._lock:
+            if self._closed:
+                return False
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._run, name=f"ThumbnailFetcher-{index}", daemon=True)
+                                 for index in range(self.workers)]
+                for thread in self._threads:
+                    thread.start()
+            self._queue.put((url, Path(path), callback))
+        return True
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=5.0):
+        """Finish the queued fetches, waiting at most timeout seconds in total."""
+        with self._lock:
+            self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        connections = {}  # (scheme, host, port) -> HTTP(S)Connection, private to this thread
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                url, path, callback = item
+                error = None
+                try:
+                    self.download(url, path, connections)
+                except Exception as e:
+                    error = str(e)
+                    print(f"Error downloading thumbnail {url}: {e}")
+                if callback is not None:
+                    try:
+                        callback(None if error else path, error)
+                    except Exception as e:
+                        print(f"Error in thumbnail callback: {e}")
+        finally:
+            for connection in connections.values():
+                connection.close()
+
+    def download(self, url, path, connections=None):
+        """Fetch url into path with retries, raises FetchError when every attempt failed."""
+        connections = {} if connections is None else connections
+        for attempt in range(self.retries + 1):
+            try:
+                data = self._get(url, connections)
+                break
+            except FetchError as e:
+                if not e.retry or attempt == self.retries:
+                    raise
+            # 0.5 s, 1 s, 2 s... with jitter so parallel fetches to one host do not retry in lockstep
+            time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.75, 1.25))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return path
+
+    def _get(self, url, connections):
+        for _ in range(self.MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https'):
+                raise FetchError(f"unsupported URL scheme: {parts.scheme}")
+            key = (parts.scheme, parts.hostname, parts.port)
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+
+            response = None
+            # A kept-alive connection may have been closed by the server meanwhile, retry once on a new one
+            for reused in (key in connections, False):
+                connection = connections.get(key)
+                if connection is None:
+                    connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                        else http.client.HTTPConnection)
+                    connection = connection_class(parts.hostname, parts.port, timeout=self.timeout)
+                    connections[key] = connection
+                try:
+                    connection.request("GET", target, headers={"User-Agent": self.USER_AGENT,
+                                                               "Accept": "image/*"})
+                    response = connection.getresponse()
+                    body = response.read(self.MAX_BYTES + 1)
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    connections.pop(key).close()
+                    if not reused:
+                        raise FetchError(f"{type(e).__name__}: {e}", retry=True)
+
+            if len(body) > self.MAX_BYTES:
+                # The rest of the body is still unread, the connection cannot serve another request
+                connections.pop(key).close()
+                raise FetchError("thumbnail too large")
+            if response.will_close:
+                connections.pop(key).close()
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader("Location")
+                if not location:
+                    raise FetchError(f"HTTP {response.status} without a Location")
+                url = urljoin(url, location)
+                continue
+            if response.status == 429 or response.status >= 500:
+                raise FetchError(f"HTTP {response.status}", retry=True)
+            if response.status != 200:
+                raise FetchError(f"HTTP {response.status}")
+            content_type = (response.getheader("Content-Type") or "").split(";")[0].strip().lower()
+            if not content_type.startswith("image/"):
+                raise FetchError(f"not an image: {content_type or 'no Content-Type'}")
+            return body
+        raise FetchError("too many redirects")
+
+
+def fetch_thumbnail(url, path, timeout=10.0, retries=2):
+    """Fetch one thumbnail on the calling thread, with the same checks as ThumbnailFetcher."""
+    fetcher = ThumbnailFetcher(workers=0, timeout=timeout, retries=retries)
+    connections = {}
+    try:
+        return fetcher.download(url, Path(path), connections)
+    finally:
+        for connection in connections.values():
+            connection.close()
@@ -0,0 +1,305 @@
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from collections import OrderedDict
+from pathlib import Path
+import threading
+import struct
+import time
+import mmap
+import os
+
+
+def make_thumbnail_image(source_path, size):
+    image = QImage(str(source_path))
+    if image.isNull():
+        return None
+    return image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+class ThumbnailAtlas:
+    """Packs fixed-size thumbnail derivatives into one memory-mapped file.
+
+    The file starts with a small header followed by equally sized slots. Every slot
+    holds a header (video_id, source mtime, width, height) and the raw premultiplied
+    ARGB32 pixels, so the video_id -> offset index is rebuilt by reading slot headers
+    when the atlas is opened. Reads are served straight from the mapping.
+    """
+    MAGIC = b"MPTA"
+    VERSION = 1
+    FILE_HEADER = struct.Struct("<4sHHH6x")    # magic, version, width, height
+    SLOT_HEADER = struct.Struct("<64sqHH4x")   # video_id, source mtime_ns, width, height
+    IMAGE_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+
+    def __init__(self, path, size=QSize(60, 40)):
+        self.path = Path(path)
+        self.size = size
+        self.pixel_bytes = size.width() * size.height() * 4
+        self.slot_size = self.SLOT_HEADER.size + self.pixel_bytes
+        self._lock = threading.RLock()
+        self._map = None
+        self.offsets = {}      # video_id -> (slot offset, source mtime_ns)
+        self.free_slots = []
+        self._open()
+
+    def _open(self):
+        expected_header = self.FILE_HEADER.pack(self.MAGIC, self.VERSION, self.size.width(), self.size.height())
+        try:
+            if self.path.exists():
+                with open(self.path, 'rb') as f:
+                    if f.read(self.FILE_HEADER.size) != expected_header:
+                        raise ValueError("atlas header mismatch")
+            else:
+                with open(self.path, 'wb') as f:
+                    f.write(expected_header)
+        except Exception as e:
+            print(f"Recreating thumbnail atlas {self.path}: {e}")
+            with open(self.path, 'wb') as f:
+                f.write(expected_header)
+
+        file_size = self.path.stat().st_size
+        slot_count = (file_size - self.FILE_HEADER.size) // self.slot_size
+        complete_size = self.FILE_HEADER.size + slot_count * self.slot_size
+        if complete_size != file_size:
+            # Drop a slot left half-written by a crash
+            os.truncate(self.path, complete_size)
+
+        mapped = self._mapping()
+        for slot in range(slot_count):
+            offset = self.FILE_HEADER.size + slot * self.slot_size
+            raw_id, mtime_ns, _, _ = self.SLOT_HEADER.unpack_from(mapped, offset)
+            video_id = raw_id.rstrip(b"\0").decode('utf-8', errors='ignore')
+            if video_id:
+                self.offsets[video_id] = (offset, mtime_ns)
+            else:
+                self.free_slots.append(offset)
+
+    def _mapping(self):
+        if self._map is None:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _unmap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def close(self):
+        with self._lock:
+            self._unmap()
+
+    def __contains__(self, video_id):
+        return video_id in self.offsets
+
+    def source_mtime(self, video_id):
+        entry = self.offsets.get(video_id)
+        return entry[1] if entry else None
+
+    def get(self, video_id):
+        with self._lock:
+            entry = self.offsets.get(video_id)
+            if entry is None:
+                return None
+            offset = entry[0]
+            mapped = self._mapping()
+            _, _, width, height = self.SLOT_HEADER.unpack_from(mapped, offset)
+            start = offset + self.SLOT_HEADER.size
+            pixels = bytes(mapped[start:start + width * height * 4])
+        return QImage(pixels, width, height, width * 4, self.IMAGE_FORMAT).copy()
+
+    def add(self, video_id, image, source_mtime_ns=0):
+        encoded_id = video_id.encode('utf-8')
+        if not encoded_id or len(encoded_id) > 64:
+            return False
+        if image.width() > self.size.width() or image.height() > self.size.height():
+            image = image.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        image = image.convertToFormat(self.IMAGE_FORMAT)
+        width, height = image.width(), image.height()
+        pixels = bytes(image.constBits().asstring(image.sizeInBytes()))[:width * height * 4]
+        slot = (self.SLOT_HEADER.pack(encoded_id, source_mtime_ns, width, height)
+                + pixels.ljust(self.pixel_bytes, b"\0"))
+
+        with self._lock:
+            if video_id in self.offsets:
+                offset = self.offsets[video_id][0]
+            elif self.free_slots:
+                offset = self.free_slots.pop()
+            else:
+                offset = None
+            self._unmap()
+            with open(self.path, 'r+b') as f:
+                if offset is None:
+                    offset = f.seek(0, os.SEEK_END)
+                else:
+                    f.seek(offset)
+                f.write(slot)
+            self.offsets[video_id] = (offset, source_mtime_ns)
+        return True
+
+    def add_from_file(self, video_id, source_path):
+        try:
+            image = make_thumbnail_image(source_path, self.size)
+            if image is None:
+                return False
+            return self.add(video_id, image, os.stat(source_path).st_mtime_ns)
+        except Exception as e:
+            print(f"Error adding {video_id} to thumbnail atlas: {e}")
+            return False
+
+    def remove(self, video_id):
+        with self._lock:
+            entry = self.offsets.pop(video_id, None)
+            if entry is None:
+                return
+            self._unmap()
+            with open(self.path, 'r+b') as f:
+                f.seek(entry[0])
+                f.write(self.SLOT_HEADER.pack(b"", 0, 0, 0))
+            self.free_slots.append(entry[0])
+
+
+class ThumbnailSignals(QObject):
+    loaded = pyqtSignal(str, object, QImage)  # video_id, mtime_ns, scaled image
+    failed = pyqtSignal(str, object)       # video_id, mtime_ns of the file or None when it is missing
+
+
+class ThumbnailLoadTask(QRunnable):
+    def __init__(self, video_id, path, size, signals):
+        super().__init__()
+        self.video_id = video_id
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        mtime_ns = None
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            image = make_thumbnail_image(self.path, self.size)
+            if image is None:
+                self.signals.failed.emit(self.video_id, mtime_ns)
+                return
+            self.signals.loaded.emit(self.video_id, mtime_ns, image)
+        except Exception as e:
+            print(f"Error loading thumbnail {self.path}: {e}")
+            self.signals.failed.emit(self.video_id, mtime_ns)
+
+
+class ThumbnailLoader(QObject):
+    """Decodes and scales thumbnails on a thread pool and keeps the results in an LRU cache.
+
+    Cache entries are keyed by (video_id, mtime_ns) so a replaced thumbnail file is
+    never served stale, and the cache is bounded by the total size of its pixmaps. A
+    thumbnail that failed to load (missing, or still being written) is tried again once
+    its file has changed, checked at most every FAILED_RETRY_SECONDS.
+    """
+    FAILED_RETRY_SECONDS = 5.0
+    thumbnail_ready = pyqtSignal(str)  # video_id
+
+    def __init__(self, size=QSize(60, 40), max_bytes=32 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.atlas = None
+        self.max_bytes = max_bytes
+        self.cache = OrderedDict()  # (video_id, mtime_ns) -> QPixmap
+        self.cache_bytes = 0
+        self.current_keys = {}      # video_id -> (video_id, mtime_ns) of the last decoded image
+        self.pending = set()
+        self.failed = {}            # video_id -> (mtime_ns of the failed file or None, monotonic time of the next check)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() // 2))
+
+        self.signals = ThumbnailSignals(self)
+        self.signals.loaded.connect(self.on_loaded)
+        self.signals.failed.connect(self.on_failed)
+
+    def get(self, video_id, path):
+        """Return the cached pixmap, or None and schedule a background load."""
+        key = self.current_keys.get(video_id)
+        if key is not None:
+            pixmap = self.cache.get(key)
+            if pixmap is not None:
+                self.cache.move_to_end(key)
+                return pixmap
+
+        if self.atlas is not None and video_id in self.atlas:
+            image = self.atlas.get(video_id)
+            if image is not None and not image.isNull():
+                return self._insert((video_id, self.atlas.source_mtime(video_id)), QPixmap.fromImage(image))
+
+        if video_id in self.failed and not self._retry_failed(video_id, path):
+            return None
+        if video_id not in self.pending:
+            self.pending.add(video_id)
+            self.pool.start(ThumbnailLoadTask(video_id, str(path), self.size, self.signals))
+        return None
+
+    def invalidate(self, video_id, remove_from_atlas=False):
+        if remove_from_atlas and self.atlas is not None:
+            self.atlas.remove(video_id)
+        key = self.current_keys.pop(video_id, None)
+        if key is not None:
+            self._evict(key)
+        # A load still running may have read the old file, let the next get() start a fresh one
+        self.pending.discard(video_id)
+        self.failed.pop(video_id, None)
+
+    def on_loaded(self, video_id, mtime_ns, image):
+        self.pending.discard(video_id)
+        self.failed.pop(video_id, None)
+        if self.atlas is not None:
+            # Missing atlas entries are regenerated lazily from the full-size thumbnail
+            self.atlas.add(video_id, image, mtime_ns)
+        self._insert((video_id, mtime_ns), QPixmap.fromImage(image))
+        self.thumbnail_ready.emit(video_id)
+
+    def _insert(self, key, pixmap):
+        video_id = key[0]
+        old_key = self.current_keys.get(video_id)
+        if old_key is not None and old_key != key:
+            self._evict(old_key)
+        self.current_keys[video_id] = key
+
+        if key not in self.cache:
+            self.cache[key] = pixmap
+            self.cache_bytes += self._pixmap_bytes(pixmap)
+            while self.cache_bytes > self.max_bytes and len(self.cache) > 1:
+                oldest_key = next(iter(self.cache))
+                self._evict(oldest_key)
+                if self.current_keys.get(oldest_key[0]) == oldest_key:
+                    del self.current_keys[oldest_key[0]]
+        return self.cache.get(key, pixmap)
+
+    def on_failed(self, video_id, mtime_ns):
+        if video_id not in self.pending:
+            return  # started before invalidate(), the file has been replaced since
+        self.pending.discard(video_id)
+        self.failed[video_id] = (mtime_ns, time.monotonic() + self.FAILED_RETRY_SECONDS)
+
+    def _retry_failed(self, video_id, path):
+        mtime_ns, next_check = self.failed[video_id]
+        now = time.monotonic()
+        if now < next_check:
+            return False
+        try:
+            current = os.stat(path).st_mtime_ns
+        except OSError:
+            current = None
+        if current is None or current == mtime_ns:
+            self.failed[video_id] = (mtime_ns, now + self.FAILED_RETRY_SECONDS)
+            return False
+        del self.failed[video_id]
+        return True
+
+    def _evict(self, key):
+        pixmap = self.cache.pop(key, None)
+        if pixmap is not None:
+            self.cache_bytes -= self._pixmap_bytes(pixmap)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)